@@ -0,0 +1,64 @@
+"""
+Synthetic release assets, in every supported format.
+"""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import lzma
+import os
+import tarfile
+import zipfile
+from pathlib import Path
+from shutil import copyfileobj
+from typing import Any, Callable
+
+from gh_release_install.unpack import zstd
+
+COPY_BUFSIZE = 1024 * 1024
+
+OPENERS: dict[str, Callable[..., Any]] = {
+    "gz": gzip.open,
+    "bz2": bz2.open,
+    "xz": lzma.open,
+}
+if zstd is not None:
+    OPENERS["zst"] = zstd.open
+
+COMPRESSED_FORMATS = tuple(OPENERS)
+ARCHIVE_FORMATS = (*(f"tar.{fmt}" for fmt in OPENERS), "zip")
+
+
+def write_asset(path: Path, size: int):
+    """
+    Write an asset made of half random, half repeated data, so the compressed
+    formats have something to compress.
+    """
+    block = os.urandom(COPY_BUFSIZE // 2) + bytes(COPY_BUFSIZE // 2)
+    with path.open("wb") as asset_fd:
+        written = 0
+        while written < size:
+            chunk = block[: size - written]
+            asset_fd.write(chunk)
+            written += len(chunk)
+
+
+def build_asset(raw: Path, fmt: str, member: str = "tool") -> Path:
+    """
+    Compress or archive the raw asset, archives contain the raw asset as member.
+    """
+    asset = raw.with_name(f"{raw.name}.{fmt}")
+    if fmt in OPENERS:
+        with raw.open("rb") as raw_fd, OPENERS[fmt](asset, "wb") as asset_fd:
+            copyfileobj(raw_fd, asset_fd, COPY_BUFSIZE)
+    elif fmt.startswith("tar."):
+        with OPENERS[fmt[4:]](asset, "wb") as asset_fd:
+            with tarfile.open(fileobj=asset_fd, mode="w|") as tar_fd:
+                tar_fd.add(raw, arcname=member)
+    elif fmt == "zip":
+        with zipfile.ZipFile(asset, "w", zipfile.ZIP_DEFLATED) as zip_fd:
+            zip_fd.write(raw, arcname=member)
+    else:
+        raise ValueError(f"unknown format {fmt}")
+    return asset
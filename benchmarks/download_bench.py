@@ -0,0 +1,122 @@
+"""
+Measure the throughput and CPU time of the single stream download writers, reading
+the body with `iter_content` chunks of different sizes, with the public `readinto`
+of the urllib3 response, and with `iter_response`, which reads it into a reusable
+buffer, from a local release server running in another process.
+
+    python benchmarks/download_bench.py --size 1G
+"""
+
+from __future__ import annotations
+
+import json
+import statistics
+from argparse import ArgumentParser
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter, process_time
+from typing import Callable, Iterable, Iterator
+
+from assets import write_asset
+from requests import Response, Session
+from server import ReleaseServer
+
+from gh_release_install.cache import parse_size
+from gh_release_install.download import iter_response
+
+
+def readinto(res: Response) -> Iterator[memoryview]:
+    buffer = memoryview(bytearray(1024 * 1024))
+    while size := res.raw.readinto(buffer):
+        yield buffer[:size]
+
+
+WRITERS: dict[str, Callable[[Response], Iterable]] = {
+    "iter_content-2K": lambda res: res.iter_content(chunk_size=2048),
+    "iter_content-1M": lambda res: res.iter_content(chunk_size=1024 * 1024),
+    "readinto": readinto,
+    "iter_response": iter_response,
+}
+
+
+def serve(assets_dir: Path, conn: Connection):
+    with ReleaseServer(assets_dir) as server:
+        conn.send(server.url)
+        # Serve until the benchmark asks to stop. The forked process inherits the
+        # benchmark end of the pipe, so the pipe is never closed from its side.
+        conn.recv()
+
+
+def download(session: Session, url: str, path: Path, writer: str):
+    with session.get(url, stream=True) as res, path.open("wb") as file:
+        res.raise_for_status()
+        for chunk in WRITERS[writer](res):
+            file.write(chunk)
+
+
+# pylint: disable=too-many-locals
+def run(size: int, writers: list[str], runs: int) -> dict:
+    results = []
+    with TemporaryDirectory() as tmp_dir:
+        assets_dir = Path(tmp_dir) / "assets"
+        assets_dir.mkdir()
+        write_asset(assets_dir / "tool", size)
+        target = Path(tmp_dir) / "tool"
+
+        # The server runs in another process, so it does not use our CPU time.
+        conn, child_conn = Pipe()
+        server = Process(target=serve, args=(assets_dir, child_conn), daemon=True)
+        server.start()
+        url = f"{conn.recv()}/assets/tool"
+
+        with Session() as session:
+            for writer in writers:
+                timings, cpu_times = [], []
+                for _ in range(runs):
+                    start, cpu_start = perf_counter(), process_time()
+                    download(session, url, target, writer)
+                    timings.append(perf_counter() - start)
+                    cpu_times.append(process_time() - cpu_start)
+                    assert target.stat().st_size == size
+
+                duration = statistics.median(timings)
+                cpu_time = statistics.median(cpu_times)
+                results.append(
+                    {
+                        "writer": writer,
+                        "size": size,
+                        "duration": duration,
+                        "cpu_time": cpu_time,
+                        "throughput": size / duration,
+                    }
+                )
+                print(
+                    f"{writer:<16} {duration * 1000:>10.1f}ms "
+                    f"{cpu_time * 1000:>10.1f}ms cpu "
+                    f"{size / duration / 1024**2:>10.1f}MiB/s",
+                )
+
+        conn.send("stop")
+        server.join()
+        conn.close()
+
+    return {"size": size, "runs": runs, "results": results}
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="256M")
+    parser.add_argument("--writers", default=",".join(WRITERS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    results = run(parse_size(args.size), args.writers.split(","), args.runs)
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Measure the end to end and per phase throughput, latency and peak memory of
+`GhReleaseInstall.run`, against a local stand-in of the Github API and release
+downloads, across asset sizes, formats and checksum modes.
+
+    python benchmarks/install_bench.py --sizes 1M,64M,2G --output results.json
+    python benchmarks/install_bench.py --compare before.json after.json
+
+Each case runs in a fresh process, so the peak memory is measured per case. A child
+process starts with the peak memory of its parent, so on Linux the peak is reset
+when the case starts, elsewhere the peak includes the benchmark process peak.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+from argparse import ArgumentParser
+from importlib.metadata import PackageNotFoundError, version
+from itertools import product
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from assets import (
+    ARCHIVE_FORMATS,
+    COMPRESSED_FORMATS,
+    COPY_BUFSIZE,
+    build_asset,
+    write_asset,
+)
+from server import ReleaseServer
+
+from gh_release_install import GhReleaseInstall
+from gh_release_install.cache import parse_size
+from gh_release_install.main import new_session
+
+REPOSITORY = "bench/tool"
+CHECKSUM_FILE = "checksums.txt"
+
+FORMATS = ("raw", *COMPRESSED_FORMATS, *ARCHIVE_FORMATS)
+CHECKSUM_MODES = ("none", "digest", "file")
+
+# Installer methods timed as phases.
+PHASES = {
+    "resolve": "_get_target_version",
+    "download": "_download_release_asset",
+    "verify": "_verify_checksum",
+    "extract": "_extract_release_asset",
+    "install": "_install_file",
+}
+
+
+def _asset_name(size: int, fmt: str) -> str:
+    return f"tool-{size}" if fmt == "raw" else f"tool-{size}.{fmt}"
+
+
+def _extract_name(size: int, fmt: str) -> str | None:
+    if fmt == "raw":
+        return None
+    # Single file compressed assets are unpacked under the asset name stem.
+    if fmt in COMPRESSED_FORMATS:
+        return _asset_name(size, "raw")
+    return "tool"
+
+
+def build_assets(assets_dir: Path, sizes: list[int], formats: list[str]):
+    """
+    Write the release assets for every size and format, and their checksum file.
+    """
+    for size in sizes:
+        raw = assets_dir / _asset_name(size, "raw")
+        write_asset(raw, size)
+        for fmt in formats:
+            if fmt != "raw":
+                build_asset(raw, fmt)
+
+    lines = []
+    for asset in sorted(assets_dir.iterdir()):
+        digest = hashlib.sha256()
+        with asset.open("rb") as asset_fd:
+            while chunk := asset_fd.read(COPY_BUFSIZE):
+                digest.update(chunk)
+        lines.append(f"{digest.hexdigest()}  {asset.name}\n")
+    (assets_dir / CHECKSUM_FILE).write_text("".join(lines), encoding="utf-8")
+
+
+def _checksum_option(assets_dir: Path, asset: str, mode: str) -> str | None:
+    if mode == "digest":
+        for line in (assets_dir / CHECKSUM_FILE).read_text("utf-8").splitlines():
+            digest, name = line.split()
+            if name == asset:
+                return f"sha256:{digest}"
+    if mode == "file":
+        return f"sha256:{CHECKSUM_FILE}"
+    return None
+
+
+PROC_STATUS = Path("/proc/self/status")
+PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def _reset_peak_rss():
+    # Writing 5 resets the peak resident set size of the process.
+    try:
+        PROC_CLEAR_REFS.write_text("5", encoding="utf-8")
+    except OSError:
+        pass
+
+
+def _rss(field: str) -> int:
+    """
+    Current (VmRSS) or peak (VmHWM) resident set size of the process.
+    """
+    try:
+        for line in PROC_STATUS.read_text(encoding="utf-8").splitlines():
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_case(case: dict) -> dict:
+    """
+    Install a single asset, timing each phase. Runs in the benchmark subprocess.
+    """
+    api_urls = [f"{case['server_url']}/api"]
+    # Create the session upfront, the import cost is measured by the startup benchmark.
+    session = new_session(api_urls=api_urls)
+
+    with TemporaryDirectory() as tmp_dir:
+        installer = GhReleaseInstall(
+            repository=REPOSITORY,
+            asset=case["asset"],
+            destination=Path(tmp_dir) / "tool",
+            extract=case["extract"],
+            checksum=case["checksum"],
+            connections=case["connections"],
+            session=session,
+            api_urls=api_urls,
+            download_urls=[case["server_url"]],
+        )
+
+        phases: dict[str, float] = {}
+        for phase, method_name in PHASES.items():
+            method = getattr(installer, method_name)
+
+            def timed(*args, _phase=phase, _method=method, **kwargs):
+                start = perf_counter()
+                try:
+                    return _method(*args, **kwargs)
+                finally:
+                    phases[_phase] = phases.get(_phase, 0) + perf_counter() - start
+
+            setattr(installer, method_name, timed)
+
+        _reset_peak_rss()
+        baseline_rss = _rss("VmRSS")
+        start = perf_counter()
+        installer.run()
+        total = perf_counter() - start
+        peak_rss = _rss("VmHWM")
+
+    return {
+        "total": total,
+        "phases": phases,
+        "baseline_rss": baseline_rss,
+        "peak_rss": peak_rss,
+    }
+
+
+def _spawn_case(case: dict) -> dict:
+    process = subprocess.run(
+        [sys.executable, __file__, "--run-case", json.dumps(case)],
+        check=False,
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"case {case['asset']} failed:\n{process.stderr}")
+    return json.loads(process.stdout)
+
+
+def _package_version() -> str:
+    try:
+        return version("gh_release_install")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+# pylint: disable=too-many-locals
+def run(
+    sizes: list[int],
+    formats: list[str],
+    checksum_modes: list[str],
+    runs: int,
+    connections: int,
+) -> dict:
+    results = []
+    with TemporaryDirectory() as tmp_dir:
+        assets_dir = Path(tmp_dir)
+        build_assets(assets_dir, sizes, formats)
+
+        with ReleaseServer(assets_dir) as server:
+            for size, fmt, mode in product(sizes, formats, checksum_modes):
+                asset = _asset_name(size, fmt)
+                case = {
+                    "server_url": server.url,
+                    "asset": asset,
+                    "extract": _extract_name(size, fmt),
+                    "checksum": _checksum_option(assets_dir, asset, mode),
+                    "connections": connections,
+                }
+                samples = [_spawn_case(case) for _ in range(runs)]
+                total = statistics.median(sample["total"] for sample in samples)
+                result = {
+                    "name": f"{fmt}/{size}/{mode}",
+                    "size": size,
+                    "format": fmt,
+                    "checksum": mode,
+                    "asset_size": (assets_dir / asset).stat().st_size,
+                    "total": total,
+                    "throughput": size / total,
+                    "phases": {
+                        phase: statistics.median(
+                            sample["phases"].get(phase, 0) for sample in samples
+                        )
+                        for phase in PHASES
+                    },
+                    "peak_rss": max(sample["peak_rss"] for sample in samples),
+                    "peak_rss_delta": max(
+                        sample["peak_rss"] - sample["baseline_rss"]
+                        for sample in samples
+                    ),
+                    "samples": samples,
+                }
+                print(
+                    f"{result['name']:<32} {total * 1000:>10.1f}ms "
+                    f"{result['throughput'] / 1024**2:>10.1f}MiB/s "
+                    f"{result['peak_rss_delta'] / 1024**2:>8.1f}MiB",
+                    file=sys.stderr,
+                )
+                results.append(result)
+
+    return {
+        "version": _package_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "connections": connections,
+        "runs": runs,
+        "results": results,
+    }
+
+
+def compare(before_path: Path, after_path: Path):
+    before = json.loads(before_path.read_text("utf-8"))
+    after = json.loads(after_path.read_text("utf-8"))
+    before_results = {result["name"]: result for result in before["results"]}
+
+    print(f"{'case':<32} {'before':>10} {'after':>10} {'ratio':>7}")
+    for result in after["results"]:
+        previous = before_results.get(result["name"])
+        if previous is None:
+            continue
+        print(
+            f"{result['name']:<32} "
+            f"{previous['total'] * 1000:>8.1f}ms "
+            f"{result['total'] * 1000:>8.1f}ms "
+            f"{result['total'] / previous['total']:>6.2f}x"
+        )
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1M,16M,128M")
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--checksums", default=",".join(CHECKSUM_MODES))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--run-case", help="Internal, run a single case.")
+    args = parser.parse_args()
+
+    if args.run_case is not None:
+        print(json.dumps(run_case(json.loads(args.run_case))))
+        return
+
+    if args.compare is not None:
+        compare(*args.compare)
+        return
+
+    results = run(
+        sizes=[parse_size(size) for size in args.sizes.split(",")],
+        formats=args.formats.split(","),
+        checksum_modes=args.checksums.split(","),
+        runs=args.runs,
+        connections=args.connections,
+    )
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Local stand-in for the Github API and release downloads, serving synthetic
+releases from a directory.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
+
+TAG = "v1.0.0"
+
+LATEST_RE = re.compile(r"^/api/repos/([^/]+/[^/]+)/releases/latest$")
+DOWNLOAD_RE = re.compile(r"^/([^/]+/[^/]+)/releases/download/([^/]+)/([^/]+)$")
+ASSET_RE = re.compile(r"^/assets/([^/]+)$")
+RANGE_RE = re.compile(r"^bytes=(\d+)-(\d*)$")
+
+COPY_BUFSIZE = 1024 * 1024
+
+
+class ReleaseHandler(BaseHTTPRequestHandler):
+    """
+    Serve the latest release tag from the API, redirect the release downloads to the
+    assets storage, and serve the assets with range requests support, the same way
+    Github does.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Avoid the delayed ACK stalls between the headers and the body writes.
+    disable_nagle_algorithm = True
+    assets_dir: Path
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def _send_json(self, content: dict):
+        body = json.dumps(content).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, status: int, **headers: str):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_asset(self, path: Path):
+        size = path.stat().st_size
+        start, end = 0, size - 1
+
+        match = RANGE_RE.search(self.headers.get("Range", ""))
+        if match is not None:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or end), end)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"{size}-{int(path.stat().st_mtime)}"')
+        self.end_headers()
+
+        with path.open("rb") as asset_fd:
+            asset_fd.seek(start)
+            remaining = end - start + 1
+            try:
+                while remaining > 0:
+                    chunk = asset_fd.read(min(COPY_BUFSIZE, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client may drop the response, e.g. to switch to range requests.
+                self.close_connection = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        if match := LATEST_RE.search(self.path):
+            self._send_json({"tag_name": TAG})
+            return
+
+        if match := DOWNLOAD_RE.search(self.path):
+            self._send_empty(302, Location=f"/assets/{match.group(3)}")
+            return
+
+        if match := ASSET_RE.search(self.path):
+            path = self.assets_dir / match.group(1)
+            if path.is_file():
+                self._send_asset(path)
+                return
+
+        self._send_empty(404)
+
+
+class ReleaseServer:
+    """
+    Run the release stand-in on a random local port, in a background thread.
+    """
+
+    def __init__(self, assets_dir: Path) -> None:
+        handler = type("Handler", (ReleaseHandler,), {"assets_dir": assets_dir})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def __enter__(self) -> ReleaseServer:
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
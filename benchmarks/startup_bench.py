@@ -0,0 +1,62 @@
+"""
+Measure the startup time of the CLI when the pinned version is already installed,
+which is the path taken by most of the periodic invocations.
+
+    python benchmarks/startup_bench.py --runs 50
+"""
+
+from __future__ import annotations
+
+import json
+import statistics
+import subprocess
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+
+def run(runs: int) -> dict:
+    with TemporaryDirectory() as tmp_dir:
+        destination = Path(tmp_dir) / "tool"
+        destination.write_text("binary", encoding="utf-8")
+        version_file = Path(tmp_dir) / "tool.version"
+        version_file.write_text("v1.0.0", encoding="utf-8")
+
+        command = [
+            sys.executable,
+            "-c",
+            "from gh_release_install.cli import run; run()",
+            "owner/tool",
+            "tool-{tag}",
+            str(destination),
+            "--version=v1.0.0",
+            f"--version-file={version_file}",
+        ]
+
+        timings = []
+        for _ in range(runs):
+            start = perf_counter()
+            subprocess.run(command, check=True, capture_output=True)
+            timings.append(perf_counter() - start)
+
+    return {
+        "benchmark": "startup",
+        "runs": runs,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+    }
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.runs), indent=2))
+
+
+if __name__ == "__main__":
+    main()
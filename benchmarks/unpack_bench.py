@@ -0,0 +1,96 @@
+"""
+Measure the decompression throughput and peak memory of the supported asset
+formats, extracting a single file as the installer does.
+
+    python benchmarks/unpack_bench.py --size 256M
+"""
+
+from __future__ import annotations
+
+import json
+import resource
+import statistics
+from argparse import ArgumentParser
+from pathlib import Path
+from shutil import rmtree, unpack_archive
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from assets import ARCHIVE_FORMATS, COMPRESSED_FORMATS, build_asset, write_asset
+
+from gh_release_install.cache import parse_size
+from gh_release_install.unpack import (
+    can_extract_member,
+    extract_member,
+    register_unpack_formats,
+)
+
+FORMATS = (*COMPRESSED_FORMATS, *ARCHIVE_FORMATS)
+
+
+def unpack(asset: Path, extract_dir: Path):
+    if can_extract_member(asset):
+        extract_member(asset, "tool", extract_dir)
+    else:
+        unpack_archive(asset, extract_dir)
+
+
+def run(size: int, formats: list[str], runs: int) -> dict:
+    register_unpack_formats()
+    results = []
+    with TemporaryDirectory() as tmp_dir:
+        raw = Path(tmp_dir) / "tool"
+        write_asset(raw, size)
+
+        for fmt in formats:
+            asset = build_asset(raw, fmt)
+            extract_dir = Path(tmp_dir) / "extract"
+
+            timings = []
+            for _ in range(runs):
+                extract_dir.mkdir()
+                start = perf_counter()
+                unpack(asset, extract_dir)
+                timings.append(perf_counter() - start)
+                rmtree(extract_dir)
+
+            duration = statistics.median(timings)
+            results.append(
+                {
+                    "format": fmt,
+                    "size": size,
+                    "asset_size": asset.stat().st_size,
+                    "duration": duration,
+                    "throughput": size / duration,
+                }
+            )
+            print(
+                f"{fmt:<10} {duration * 1000:>10.1f}ms "
+                f"{size / duration / 1024**2:>10.1f}MiB/s",
+            )
+            asset.unlink()
+
+    return {
+        "size": size,
+        "runs": runs,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "results": results,
+    }
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="64M")
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    results = run(parse_size(args.size), args.formats.split(","), args.runs)
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
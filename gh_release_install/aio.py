@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any
+
+from requests import Session
+
+from .batch import BatchResult, install_entry, resolve_latest_tags, run_installer
+from .download import DEFAULT_CONNECTIONS
+from .main import GhReleaseInstall, new_session
+from .unpack import register_unpack_formats
+
+__all__ = [
+    "AsyncGhReleaseInstall",
+    "run_async_batch",
+]
+
+logger = logging.getLogger(__name__)
+
+
+# pylint: disable=too-few-public-methods
+class AsyncGhReleaseInstall:
+    """
+    Asyncio counterpart of `GhReleaseInstall`, accepting the same keyword arguments.
+
+    The blocking network I/O, hashing and extraction run in an executor, so the
+    event loop is never blocked. Many installers may share a single session, and
+    therefore a single connection pool, and a single executor.
+    """
+
+    def __init__(
+        self,
+        *,
+        session: Session | None = None,
+        executor: Executor | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._installer = GhReleaseInstall(**kwargs, session=session)
+        self._executor = executor
+
+    @property
+    def installer(self) -> GhReleaseInstall:
+        return self._installer
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, run_installer, self._installer)
+
+
+async def run_async_batch(
+    entries: list[dict[str, Any]],
+    workers: int = 16,
+    **options: Any,
+) -> list[BatchResult]:
+    """
+    Install the entries concurrently from an event loop, sharing a single HTTP
+    session and a bounded executor between all the installers. The options are
+    passed to every installer.
+    """
+    register_unpack_formats()
+    connections = options.get("connections", DEFAULT_CONNECTIONS)
+    loop = asyncio.get_running_loop()
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        with new_session(
+            pool_maxsize=workers * connections,
+            api_urls=options.get("api_urls"),
+        ) as session:
+            tags = await loop.run_in_executor(
+                executor, resolve_latest_tags, session, entries, options
+            )
+            # The installers are created in the executor, so an invalid entry only
+            # fails its own result.
+            outcomes = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        executor, install_entry, session, entry, options, tags
+                    )
+                    for entry in entries
+                ),
+                return_exceptions=True,
+            )
+    finally:
+        # Do not block the event loop on the pending installs when cancelled.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for entry, outcome in zip(entries, outcomes):
+        if isinstance(outcome, BaseException):
+            outcome = BatchResult(entry, error=outcome)
+            logger.error("Failed '%s': %s", outcome.name, outcome.error)
+        results.append(outcome)
+
+    return results
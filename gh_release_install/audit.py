@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from .cache import Cache
+from .checksum import compute_file_checksum
+from .main import GhReleaseInstall, new_session
+
+__all__ = [
+    "AuditResult",
+    "audit",
+    "manifest_targets",
+    "recorded_targets",
+]
+
+logger = logging.getLogger(__name__)
+
+# Statuses of the audited files, the failed statuses denote a drift.
+OK = "ok"
+MISMATCH = "mismatch"
+MISSING = "missing"
+UNKNOWN = "unknown"
+ERROR = "error"
+FAILED_STATUSES = (MISMATCH, MISSING, ERROR)
+
+
+class AuditResult:
+    """
+    Audit of an installed file, comparing its digest with the expected digest.
+    """
+
+    def __init__(
+        self,
+        destination: Path,
+        algorithm: str | None = None,
+        expected: str | None = None,
+        error: str | None = None,
+    ) -> None:
+        self.destination = destination
+        self.algorithm = algorithm
+        self.expected = expected
+        self.actual: str | None = None
+        self.error = error
+        self.status = ERROR if error is not None else UNKNOWN
+
+    @property
+    def ok(self) -> bool:
+        return self.status not in FAILED_STATUSES
+
+    def to_dict(self) -> dict:
+        return {
+            "destination": str(self.destination),
+            "status": self.status,
+            "algorithm": self.algorithm,
+            "expected": self.expected,
+            "actual": self.actual,
+            "error": self.error,
+        }
+
+
+def recorded_targets(cache: Cache) -> list[AuditResult]:
+    """
+    Audit targets of the installs recorded in the cache.
+    """
+    return [
+        AuditResult(Path(record["destination"]), record["algorithm"], record["digest"])
+        for record in cache.installs()
+    ]
+
+
+def manifest_targets(
+    entries: list[dict[str, Any]],
+    cache: Cache | None = None,
+    **options: Any,
+) -> list[AuditResult]:
+    """
+    Audit targets of the manifest entries, expecting the digests from the entries
+    checksums, or from the installs recorded in the cache when the checksums do not
+    apply to the installed files. The installed versions are read from the version
+    files, or from the recorded installs, the other targets are unknown.
+    """
+    results = []
+    with new_session(api_urls=options.get("api_urls")) as session:
+        for entry in entries:
+            try:
+                installer = GhReleaseInstall(**{**options, **entry}, session=session)
+                record = None
+                if cache is not None:
+                    record = cache.get_install(installer.destination)
+                checksum = installer.installed_checksum(record)
+                if checksum is None and record is not None:
+                    checksum = record["algorithm"], record["digest"]
+            # pylint: disable=broad-except
+            except Exception as exception:
+                results.append(
+                    AuditResult(Path(entry["destination"]), error=str(exception))
+                )
+                continue
+
+            result = AuditResult(installer.destination)
+            if checksum is not None:
+                result.algorithm, result.expected = checksum
+            results.append(result)
+
+    return results
+
+
+def _file_checksum(algorithm: str, path: str) -> str | None:
+    try:
+        return compute_file_checksum(algorithm, Path(path))
+    except FileNotFoundError:
+        return None
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def audit(results: list[AuditResult], workers: int | None = None) -> list[AuditResult]:
+    """
+    Hash the audited files on a process pool, so the hashing is not bound to a single
+    core, and set their status.
+    """
+    pending = [
+        result
+        for result in results
+        if result.error is None
+        and result.algorithm is not None
+        and result.expected is not None
+    ]
+    # Start with the largest files, so a large file does not end the audit alone.
+    pending.sort(key=lambda result: _size(result.destination), reverse=True)
+    if not pending:
+        return results
+
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    # Forking a process running the background checksum threads is unsafe.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        futures = []
+        for result in pending:
+            assert result.algorithm is not None
+            futures.append(
+                executor.submit(
+                    _file_checksum, result.algorithm, str(result.destination)
+                )
+            )
+        for result, future in zip(pending, futures):
+            try:
+                result.actual = future.result()
+            except OSError as exception:
+                result.error = str(exception)
+                result.status = ERROR
+                continue
+
+            if result.actual is None:
+                result.status = MISSING
+            elif result.actual == result.expected:
+                result.status = OK
+            else:
+                result.status = MISMATCH
+                logger.warning("Checksum mismatch for '%s'", result.destination)
+
+    return results
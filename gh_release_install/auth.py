@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Sequence
+from urllib.parse import urlsplit
+
+__all__ = [
+    "TokenAuth",
+    "github_hosts",
+]
+
+GITHUB_HOSTS = ("github.com", "api.github.com")
+# The REST API of a Github Enterprise server is served under this path.
+GITHUB_ENTERPRISE_API_PATH = "/api/v3"
+
+
+def github_hosts(api_urls: Sequence[str]) -> set[str]:
+    """
+    Hosts of Github and of the Github Enterprise servers among the api urls, the
+    other urls are e.g. mirrors.
+    """
+    hosts = set(GITHUB_HOSTS)
+    for api_url in api_urls:
+        url = urlsplit(api_url)
+        if url.scheme == "https" and url.path.rstrip("/") == GITHUB_ENTERPRISE_API_PATH:
+            assert url.hostname is not None
+            hosts.add(url.hostname)
+    return hosts
+
+
+# pylint: disable=too-few-public-methods
+class TokenAuth:
+    """
+    Authenticate the https requests to the Github hosts with a token, so the token
+    is never sent to a mirror, or to the host a download was redirected to.
+    """
+
+    def __init__(self, token: str, hosts: set[str]) -> None:
+        self.token = token
+        self.hosts = hosts
+
+    def __call__(self, request):
+        url = urlsplit(request.url)
+        if url.scheme == "https" and url.hostname in self.hosts:
+            request.headers["Authorization"] = f"token {self.token}"
+        return request
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .cache import Cache
+from .download import DEFAULT_CONNECTIONS
+from .main import LATEST, GhReleaseInstall, new_session
+from .metrics import Metrics
+from .releases import get_latest_tags
+from .unpack import register_unpack_formats
+
+if TYPE_CHECKING:
+    from requests import Session
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None  # type: ignore[assignment]
+
+__all__ = [
+    "BatchResult",
+    "check_batch",
+    "install_entry",
+    "load_manifest",
+    "resolve_latest_tags",
+    "run_batch",
+    "run_installer",
+]
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FIELDS = (
+    "repository",
+    "asset",
+    "destination",
+    "extract",
+    "remote_extract",
+    "version",
+    "version_file",
+    "checksum",
+    "owner",
+    "group",
+    "mode",
+)
+MANIFEST_REQUIRED_FIELDS = ("repository", "asset", "destination")
+
+
+def load_manifest(path: Path) -> list[dict[str, Any]]:
+    """
+    Load a list of install entries from a JSON or TOML manifest file.
+
+    A JSON manifest is a list of objects, a TOML manifest is a list of `[[install]]`
+    tables. Each entry accepts the same fields as `GhReleaseInstall`.
+    """
+    if path.suffix == ".toml":
+        if tomllib is None:
+            raise ValueError("TOML manifests require Python 3.11 or later")
+        with path.open("rb") as manifest_fd:
+            entries = tomllib.load(manifest_fd).get("install", [])
+    else:
+        entries = json.loads(path.read_text(encoding="utf-8"))
+
+    if not isinstance(entries, list):
+        raise ValueError(f"invalid manifest {path}: expected a list of entries")
+
+    for index, entry in enumerate(entries):
+        unknown = set(entry) - set(MANIFEST_FIELDS)
+        if unknown:
+            raise ValueError(
+                f"invalid manifest entry {index}: unknown fields {sorted(unknown)}"
+            )
+        missing = set(MANIFEST_REQUIRED_FIELDS) - set(entry)
+        if missing:
+            raise ValueError(
+                f"invalid manifest entry {index}: missing fields {sorted(missing)}"
+            )
+
+    return entries
+
+
+# pylint: disable=too-few-public-methods
+class BatchResult:
+    def __init__(
+        self,
+        entry: dict[str, Any],
+        error: BaseException | None = None,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self.entry = entry
+        self.error = error
+        self.metrics = metrics
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def name(self) -> str:
+        return f"{self.entry['repository']} -> {self.entry['destination']}"
+
+
+def run_installer(installer: GhReleaseInstall) -> None:
+    """
+    Run an installer, raising an error instead of exiting the process on failure.
+    """
+    try:
+        installer.run()
+    except SystemExit as exception:
+        if exception.code not in (None, 0):
+            raise RuntimeError(
+                f"installer exited with status {exception.code}"
+            ) from exception
+
+
+def resolve_latest_tags(
+    session: Session,
+    entries: list[dict[str, Any]],
+    options: dict[str, Any],
+) -> dict[str, str]:
+    """
+    Resolve the 'latest' versions of all the entries at once.
+    """
+    repositories = [
+        entry["repository"]
+        for entry in entries
+        if entry.get("version", LATEST) == LATEST
+    ]
+
+    cache = None
+    if options.get("cache_dir") is not None:
+        cache = Cache(options["cache_dir"])
+
+    return get_latest_tags(
+        session,
+        repositories,
+        cache,
+        options.get("latest_ttl"),
+        options.get("api_urls"),
+    )
+
+
+def _new_installer(
+    session: Session,
+    entry: dict[str, Any],
+    options: dict[str, Any],
+    tags: dict[str, str],
+) -> GhReleaseInstall:
+    """
+    Create the installer of an entry, using the 'latest' version resolved for all the
+    entries at once.
+    """
+    kwargs = {**options, **entry}
+    if kwargs.get("version", LATEST) == LATEST and entry["repository"] in tags:
+        kwargs["version"] = tags[entry["repository"]]
+    return GhReleaseInstall(**kwargs, session=session)
+
+
+def install_entry(
+    session: Session,
+    entry: dict[str, Any],
+    options: dict[str, Any],
+    tags: dict[str, str],
+) -> BatchResult:
+    """
+    Install a manifest entry, the installer errors are reported in the result.
+    """
+    result = BatchResult(entry)
+    installer = None
+    try:
+        installer = _new_installer(session, entry, options, tags)
+        run_installer(installer)
+        logger.info("Succeeded '%s'", result.name)
+    # pylint: disable=broad-except
+    except Exception as exception:
+        result.error = exception
+        logger.error("Failed '%s': %s", result.name, exception)
+    finally:
+        # The installer creates the metrics of each run.
+        if installer is not None:
+            result.metrics = installer.metrics
+    return result
+
+
+def check_batch(entries: list[dict[str, Any]], **options: Any) -> list[BatchResult]:
+    """
+    Check which manifest entries are not installed in their target version. The
+    results of the up to date entries are successful.
+    """
+    results = []
+    with new_session(api_urls=options.get("api_urls")) as session:
+        tags = resolve_latest_tags(session, entries, options)
+        for entry in entries:
+            result = BatchResult(entry)
+            try:
+                installer = _new_installer(session, entry, options, tags)
+                if not installer.is_installed():
+                    result.error = RuntimeError(
+                        f"version {installer.target_version} is not installed"
+                    )
+            # pylint: disable=broad-except
+            except Exception as exception:
+                result.error = exception
+            results.append(result)
+
+    return results
+
+
+def run_batch(
+    entries: list[dict[str, Any]],
+    workers: int = 4,
+    **options: Any,
+) -> list[BatchResult]:
+    """
+    Install the manifest entries on a bounded thread pool, sharing a single HTTP
+    session between all the installers. The options are passed to every installer.
+    """
+    register_unpack_formats()
+    connections = options.get("connections", DEFAULT_CONNECTIONS)
+    session = new_session(
+        pool_maxsize=workers * connections,
+        api_urls=options.get("api_urls"),
+    )
+
+    with session, ThreadPoolExecutor(max_workers=workers) as executor:
+        tags = resolve_latest_tags(session, entries, options)
+        futures = [
+            executor.submit(install_entry, session, entry, options, tags)
+            for entry in entries
+        ]
+        return [future.result() for future in futures]
@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+from contextlib import AbstractContextManager, contextmanager
+from os import environ
+from pathlib import Path
+from shutil import copyfile
+from tempfile import mkstemp
+from time import monotonic, sleep, time
+from typing import Iterator
+
+from .checksum import compute_file_checksum
+
+__all__ = [
+    "Cache",
+    "CacheEntry",
+    "DEFAULT_CACHE_DIR",
+    "clone_file",
+    "file_lock",
+    "parse_size",
+]
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = (
+    Path(environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "gh-release-install"
+)
+
+CACHE_ALGORITHM = "sha256"
+
+# Interrupted downloads not resumed within this delay are removed when pruning.
+PARTIAL_MAX_AGE = 24 * 60 * 60
+
+# Longest delay we wait for another process holding a lock, e.g. downloading a
+# large asset, before proceeding without the lock.
+LOCK_TIMEOUT = 10 * 60
+LOCK_POLL_INTERVAL = 0.1
+
+SIZE_RE = re.compile(r"^(\d+)\s*([KMGT]?)i?B?$", re.IGNORECASE)
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a size in bytes with an optional binary unit suffix, e.g. '500M' or '2G'.
+    """
+    match = SIZE_RE.search(value.strip())
+    if match is None:
+        raise ValueError(f"invalid size {value}")
+
+    return int(match.group(1)) * SIZE_UNITS[match.group(2).upper()]
+
+
+# Linux ioctl cloning a file content, sharing the extents on copy-on-write
+# filesystems such as btrfs or xfs.
+FICLONE = 0x40049409
+
+
+def clone_file(src: Path, dst: Path):
+    """
+    Copy a file using a reflink when supported by the filesystem, which costs no
+    I/O, or a regular copy otherwise.
+    """
+    try:
+        # pylint: disable=import-outside-toplevel
+        import fcntl
+
+        with src.open("rb") as src_fd, dst.open("wb") as dst_fd:
+            fcntl.ioctl(dst_fd.fileno(), FICLONE, src_fd.fileno())
+        logger.debug("Cloned '%s' to '%s'", src, dst)
+        return
+    except (ImportError, OSError):
+        pass
+
+    copyfile(src, dst)
+
+
+def write_file_atomic(path: Path, content: str):
+    """
+    Write a text file using a temporary file and a rename, so concurrent readers
+    never see a partially written file.
+    """
+    fd, tmp_path = mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp_fd:
+            tmp_fd.write(content)
+        os.replace(tmp_path, path)
+    finally:
+        Path(tmp_path).unlink(missing_ok=True)
+
+
+@contextmanager
+def file_lock(path: Path, timeout: float = LOCK_TIMEOUT) -> Iterator[bool]:
+    """
+    Hold an exclusive lock shared between processes, and yield whether the lock was
+    acquired.
+
+    The lock is released by the system when its holder exits, even if it crashed,
+    so a lock is never left stale. A holder hanging for longer than the timeout is
+    ignored, and the caller proceeds without the lock.
+    """
+    try:
+        # pylint: disable=import-outside-toplevel
+        import fcntl
+    except ImportError:
+        yield False
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+", encoding="utf-8") as lock_fd:
+        deadline = monotonic() + timeout
+        waiting = False
+        while True:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if not waiting:
+                    logger.info("Waiting for another process holding '%s'", path)
+                    waiting = True
+                if monotonic() >= deadline:
+                    logger.warning("Timed out waiting for lock '%s'", path)
+                    yield False
+                    return
+                sleep(LOCK_POLL_INTERVAL)
+
+        try:
+            # Record the holder, to help debugging a hanging holder.
+            lock_fd.truncate(0)
+            lock_fd.write(f"{os.getpid()}\n")
+            lock_fd.flush()
+            yield True
+        finally:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+
+
+# pylint: disable=too-few-public-methods
+class CacheEntry:
+    def __init__(self, path: Path, meta: dict, last_used: float) -> None:
+        self.path = path
+        self.meta = meta
+        self.last_used = last_used
+
+    @property
+    def size(self) -> int:
+        return self.meta["size"]
+
+
+class Cache:
+    """
+    Content addressed cache of release assets, keyed by repository, tag and asset
+    name. Entries are validated against their digest before being used, and the
+    least recently used entries are evicted when the cache grows over its max size.
+    """
+
+    def __init__(self, directory: str | Path, max_size: int | None = None) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    @property
+    def _assets_dir(self) -> Path:
+        return self.directory / "assets"
+
+    def _path(self, repository: str, tag: str, asset: str) -> Path:
+        key = hashlib.sha256(f"{repository}/{tag}/{asset}".encode()).hexdigest()
+        return self._assets_dir / key
+
+    def _latest_path(self, repository: str) -> Path:
+        key = hashlib.sha256(repository.encode()).hexdigest()
+        return self.directory / "latest" / f"{key}.json"
+
+    def get_latest(self, repository: str) -> dict | None:
+        """
+        Get the cached latest release of a repository, with its HTTP validators.
+        """
+        try:
+            path = self._latest_path(repository)
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def put_latest(self, repository: str, latest: dict):
+        path = self._latest_path(repository)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_file_atomic(path, json.dumps(latest))
+
+    def _release_assets_path(self, repository: str, tag: str) -> Path:
+        key = hashlib.sha256(f"{repository}/{tag}".encode()).hexdigest()
+        return self.directory / "releases" / f"{key}.json"
+
+    def get_release_assets(self, repository: str, tag: str) -> dict | None:
+        """
+        Get the cached assets index of a release.
+        """
+        try:
+            path = self._release_assets_path(repository, tag)
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def put_release_assets(self, repository: str, tag: str, assets: dict):
+        path = self._release_assets_path(repository, tag)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_file_atomic(path, json.dumps(assets))
+
+    def lock(self, *key: str) -> AbstractContextManager[bool]:
+        """
+        Lock a key, e.g. a repository, tag and asset, across processes sharing the
+        cache, so a single process downloads the asset while the others wait and
+        reuse it.
+        """
+        name = hashlib.sha256("/".join(key).encode()).hexdigest()
+        return file_lock(self.directory / "locks" / name)
+
+    def partial_path(self, repository: str, tag: str, asset: str) -> Path:
+        """
+        Path where an interrupted download of the asset is kept to be resumed.
+        """
+        return self.directory / "partial" / self._path(repository, tag, asset).name
+
+    def _file_checksum_path(self, algorithm: str, filepath: Path) -> Path:
+        key = hashlib.sha256(f"{algorithm}:{filepath.resolve()}".encode()).hexdigest()
+        return self.directory / "checksums" / f"{key}.json"
+
+    @staticmethod
+    def _file_stat(filepath: Path) -> list[int]:
+        stat = filepath.stat()
+        return [stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    def put_file_checksum(self, algorithm: str, filepath: Path, digest: str):
+        """
+        Record the checksum of a file, along with its size, modification time and
+        inode, so it is not computed again while the file is unchanged.
+        """
+        path = self._file_checksum_path(algorithm, filepath)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"stat": self._file_stat(filepath), "digest": digest}
+        write_file_atomic(path, json.dumps(meta))
+
+    def file_checksum(self, algorithm: str, filepath: Path) -> str:
+        """
+        Compute the checksum of a file, or reuse the recorded checksum if the file
+        did not change.
+        """
+        path = self._file_checksum_path(algorithm, filepath)
+        try:
+            meta = json.loads(path.read_text(encoding="utf-8"))
+            if meta["stat"] == self._file_stat(filepath):
+                logger.debug("Reusing recorded checksum of '%s'", filepath)
+                return meta["digest"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        digest = compute_file_checksum(algorithm, filepath)
+        self.put_file_checksum(algorithm, filepath, digest)
+        return digest
+
+    def _install_path(self, destination: Path) -> Path:
+        key = hashlib.sha256(str(destination.resolve()).encode()).hexdigest()
+        return self.directory / "installs" / f"{key}.json"
+
+    def put_install(self, destination: Path, record: dict):
+        """
+        Record an installed file and its digest, so the file can be audited later.
+        """
+        path = self._install_path(destination)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        record = {**record, "destination": str(destination.resolve())}
+        write_file_atomic(path, json.dumps(record))
+
+    def get_install(self, destination: Path) -> dict | None:
+        try:
+            path = self._install_path(destination)
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def installs(self) -> list[dict]:
+        """
+        List the recorded installs, sorted by destination.
+        """
+        installs_dir = self.directory / "installs"
+        if not installs_dir.is_dir():
+            return []
+
+        records = []
+        for path in installs_dir.glob("*.json"):
+            try:
+                records.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+
+        return sorted(records, key=lambda record: record["destination"])
+
+    @staticmethod
+    def _meta_path(path: Path) -> Path:
+        return path.with_suffix(".json")
+
+    def _remove(self, path: Path):
+        path.unlink(missing_ok=True)
+        self._meta_path(path).unlink(missing_ok=True)
+
+    def get(self, repository: str, tag: str, asset: str) -> Path | None:
+        """
+        Get the path of a cached asset, or None if the asset is not cached or its
+        content does not match the recorded digest.
+        """
+        path = self._path(repository, tag, asset)
+        try:
+            meta = json.loads(self._meta_path(path).read_text(encoding="utf-8"))
+            digest = compute_file_checksum(CACHE_ALGORITHM, path)
+        except (OSError, ValueError):
+            return None
+
+        if digest != meta.get("digest"):
+            logger.warning("Removing corrupted cache entry '%s'", path)
+            self._remove(path)
+            return None
+
+        # Record the access time for the LRU eviction
+        os.utime(path)
+        logger.debug("Found asset '%s' in cache '%s'", asset, path)
+        return path
+
+    def remove(self, repository: str, tag: str, asset: str):
+        """
+        Remove an asset from the cache.
+        """
+        self._remove(self._path(repository, tag, asset))
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def put(
+        self,
+        repository: str,
+        tag: str,
+        asset: str,
+        filepath: Path,
+        move: bool = False,
+        digest: str | None = None,
+    ) -> Path:
+        """
+        Copy an asset file into the cache, or move it when the file is on the cache
+        filesystem. The asset digest is computed unless given.
+        """
+        path = self._path(repository, tag, asset)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first, so concurrent readers never see a
+        # partially written entry.
+        fd, tmp_path = mkstemp(dir=path.parent, prefix=".tmp-")
+        os.close(fd)
+        try:
+            if move:
+                os.replace(filepath, tmp_path)
+            else:
+                clone_file(filepath, Path(tmp_path))
+            if digest is None:
+                digest = compute_file_checksum(CACHE_ALGORITHM, Path(tmp_path))
+            meta = {
+                "repository": repository,
+                "tag": tag,
+                "asset": asset,
+                "size": Path(tmp_path).stat().st_size,
+                "digest": digest,
+            }
+            os.replace(tmp_path, path)
+        finally:
+            Path(tmp_path).unlink(missing_ok=True)
+
+        write_file_atomic(self._meta_path(path), json.dumps(meta))
+        logger.debug("Saved asset '%s' to cache '%s'", asset, path)
+
+        if self.max_size is not None:
+            self.prune(self.max_size, keep=path)
+
+        return path
+
+    def entries(self) -> list[CacheEntry]:
+        """
+        List the cache entries, the least recently used first.
+        """
+        if not self._assets_dir.is_dir():
+            return []
+
+        entries = []
+        for meta_path in self._assets_dir.glob("*.json"):
+            path = meta_path.with_suffix("")
+            # Another process may evict the entry meanwhile.
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                last_used = path.stat().st_mtime
+            except (OSError, ValueError):
+                continue
+            entries.append(CacheEntry(path, meta, last_used))
+
+        return sorted(entries, key=lambda entry: entry.last_used)
+
+    def stats(self) -> dict:
+        entries = self.entries()
+        return {
+            "directory": str(self.directory),
+            "entries": len(entries),
+            "size": sum(entry.size for entry in entries),
+            "max_size": self.max_size,
+        }
+
+    def prune(self, max_size: int = 0, keep: Path | None = None) -> list[CacheEntry]:
+        """
+        Evict the least recently used entries until the cache size is below
+        max_size, except the kept entry, e.g. the entry just added, even when it is
+        larger than max_size. Returns the evicted entries.
+        """
+        partial_dir = self.directory / "partial"
+        if partial_dir.is_dir():
+            for path in partial_dir.iterdir():
+                # Another process may finish or remove the partial download meanwhile.
+                try:
+                    modified = path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if time() - modified > PARTIAL_MAX_AGE:
+                    logger.debug("Removing stale partial download '%s'", path)
+                    path.unlink(missing_ok=True)
+
+        entries = self.entries()
+        size = sum(entry.size for entry in entries)
+
+        evicted = []
+        for entry in entries:
+            if size <= max_size:
+                break
+            if entry.path == keep:
+                continue
+            logger.debug("Evicting cache entry '%s'", entry.path)
+            self._remove(entry.path)
+            size -= entry.size
+            evicted.append(entry)
+
+        return evicted
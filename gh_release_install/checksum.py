@@ -3,14 +3,25 @@ from __future__ import annotations
 import hashlib
 import logging
 import re
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
+
+if TYPE_CHECKING:
+    from requests import Session
 
 __all__ = [
     "compute_file_checksum",
     "find_checksum_in_file",
+    "get_checksum_file",
     "HASH_ALGORITHM",
+    "infer_algorithm",
     "is_hexdigest",
+    "lookup_checksum",
+    "new_checksum",
+    "parse_checksum_file",
     "parse_checksum_option",
+    "update_file_checksum",
 ]
 
 logger = logging.getLogger(__name__)
@@ -30,7 +41,11 @@ def parse_checksum_option(value: str) -> tuple[str, str]:
     try:
         algorithm, checksum = value.split(":", maxsplit=1)
     except ValueError as exception:
-        raise ValueError(f"invalid checksum option {value}") from exception
+        # Support a digest without algorithm
+        inferred = infer_algorithm(value)
+        if inferred is None:
+            raise ValueError(f"invalid checksum option {value}") from exception
+        return inferred, value
 
     if algorithm not in HASH_ALGORITHM:
         raise ValueError(f"invalid checksum algorithm {algorithm}")
@@ -47,24 +62,160 @@ def is_hexdigest(algorithm: str, value: str) -> bool:
     )
 
 
-def find_checksum_in_file(content: str, filename: str) -> str | None:
-    # Support checksum list with filenames
-    for line in content.splitlines():
-        match = re.search(r"^([0-9a-fA-F]+)\s+" + re.escape(filename) + r"$", line)
-        if match is not None:
-            return match.group(1)
+def infer_algorithm(digest: str) -> str | None:
+    """
+    Infer the hash algorithm from the length of a hex digest.
+    """
+    if HEXDIGEST_RE.search(digest) is None:
+        return None
+    for algorithm, length in HASH_ALGORITHM_LENGTH.items():
+        if len(digest) == length:
+            return algorithm
+    return None
+
+
+# <digest>  <filename> or <digest> *<filename> (binary mode)
+GNU_LINE_RE = re.compile(r"^\\?([0-9a-fA-F]+)\s+\*?(.+)$")
+# <ALGORITHM> (<filename>) = <digest>
+BSD_LINE_RE = re.compile(r"^([A-Za-z0-9-]+)\s*\((.+)\)\s*=\s*([0-9a-fA-F]+)$")
+# <digest>
+DIGEST_LINE_RE = re.compile(r"^([0-9a-fA-F]+)$")
+
+# Key of a single checksum without filename in a checksum index.
+SINGLE_CHECKSUM = ""
+
+
+def _index_filename(filename: str) -> str:
+    while filename.startswith("./"):
+        filename = filename[2:]
+    return filename
+
+
+def _line_algorithm(name: str | None, digest: str) -> str | None:
+    """
+    Algorithm of a checksum line digest, inferred from the digest length, and
+    checked against the algorithm name of a BSD line.
+    """
+    algorithm = infer_algorithm(digest)
+    if name is not None and name.lower().replace("-", "") != algorithm:
+        return None
+    return algorithm
 
-    # Support a single checksum without filename
-    match = re.search(r"^([0-9a-fA-F]+)$", content)
-    if match is not None:
-        return match.group(1)
 
+def parse_checksum_file(content: str) -> dict[str, dict[str, str]]:
+    """
+    Parse a checksum file into a filename to algorithm to hex digest index.
+
+    Supports the GNU coreutils format, in text or binary mode, the BSD format, and a
+    single checksum without filename, which is indexed using an empty filename. The
+    lines using an unsupported algorithm are ignored.
+    """
+    index: dict[str, dict[str, str]] = {}
+    lines = [line.strip() for line in content.splitlines() if line.strip()]
+
+    if len(lines) == 1:
+        match = DIGEST_LINE_RE.search(lines[0])
+        if match is not None:
+            digest = match.group(1).lower()
+            algorithm = _line_algorithm(None, digest)
+            if algorithm is not None:
+                index[SINGLE_CHECKSUM] = {algorithm: digest}
+            return index
+
+    for line in lines:
+        name = None
+        match = BSD_LINE_RE.search(line)
+        if match is not None:
+            name, filename, digest = match.groups()
+        else:
+            match = GNU_LINE_RE.search(line)
+            if match is None:
+                continue
+            digest, filename = match.group(1), match.group(2)
+
+        digest = digest.lower()
+        algorithm = _line_algorithm(name, digest)
+        if algorithm is None:
+            continue
+
+        filename = _index_filename(filename)
+        index.setdefault(filename, {})[algorithm] = digest
+
+        # Also allow lookups using the basename of files listed with a directory.
+        if "/" in filename:
+            index.setdefault(filename.rsplit("/", 1)[1], {}).setdefault(
+                algorithm, digest
+            )
+
+    return index
+
+
+def _lookup_digests(index: dict[str, dict[str, str]], filename: str) -> dict[str, str]:
+    return index.get(_index_filename(filename)) or index.get(SINGLE_CHECKSUM) or {}
+
+
+def lookup_checksum(
+    index: dict[str, dict[str, str]],
+    filename: str,
+    algorithm: str,
+) -> str | None:
+    """
+    Get the hex digest of a file from a checksum index, only using a digest of the
+    given algorithm.
+    """
+    return _lookup_digests(index, filename).get(algorithm)
+
+
+def find_checksum_in_file(
+    content: str,
+    filename: str,
+    algorithm: str | None = None,
+) -> str | None:
+    """
+    Find the hex digest of a file in a checksum file, without algorithm the file must
+    be listed with a single algorithm.
+    """
+    digests = _lookup_digests(parse_checksum_file(content), filename)
+    if algorithm is None:
+        return next(iter(digests.values())) if len(digests) == 1 else None
+    return digests.get(algorithm)
+
+
+def get_checksum_file(
+    session: Session,
+    urls: Sequence[str],
+) -> dict[str, dict[str, str]] | None:
+    """
+    Download and index a checksum file from the first url serving it, returns None
+    if the file does not exist.
+    """
+    error: OSError | None = None
+    for url in urls:
+        try:
+            with session.get(url) as res:
+                # A mirror may not have the file, look for it on the next one.
+                if res.status_code == 404:
+                    continue
+                res.raise_for_status()
+
+                return parse_checksum_file(res.text)
+        except OSError as exception:
+            logger.warning("Failed to get checksum file '%s': %s", url, exception)
+            error = exception
+
+    if error is not None:
+        raise error
     return None
 
 
-def compute_file_checksum(algorithm: str, filepath: Path) -> str:
-    mixer = hashlib.new(algorithm, usedforsecurity=False)
+def new_checksum(algorithm: str) -> hashlib._Hash:
+    """
+    Create a hash object that can be fed incrementally, e.g. while downloading.
+    """
+    return hashlib.new(algorithm, usedforsecurity=False)
 
+
+def update_file_checksum(mixer: hashlib._Hash, filepath: Path):
     with filepath.open("rb") as file:
         while True:
             blob = file.read(8192)
@@ -72,6 +223,15 @@ def compute_file_checksum(algorithm: str, filepath: Path) -> str:
                 break
             mixer.update(blob)
 
+
+def compute_file_checksum(algorithm: str, filepath: Path) -> str:
+    if hasattr(hashlib, "file_digest"):  # Python >= 3.11
+        with filepath.open("rb") as file:
+            mixer = hashlib.file_digest(file, partial(new_checksum, algorithm))
+    else:
+        mixer = new_checksum(algorithm)
+        update_file_checksum(mixer, filepath)
+
     digest = mixer.hexdigest()
     logger.debug("Computed %s digest '%s'", algorithm, digest)
 
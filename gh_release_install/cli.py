@@ -1,15 +1,27 @@
 from __future__ import annotations
 
+import json
 import logging
 import sys
 from argparse import (
     ArgumentDefaultsHelpFormatter,
     ArgumentParser,
+    Namespace,
     RawDescriptionHelpFormatter,
 )
+from pathlib import Path
+from typing import Any
 
 from gh_release_install import GhReleaseInstall
+from gh_release_install.cache import DEFAULT_CACHE_DIR, Cache, parse_size
 from gh_release_install.checksum import HASH_ALGORITHM
+from gh_release_install.download import DEFAULT_CONNECTIONS
+from gh_release_install.main import GITHUB_API_URL, GITHUB_DOWNLOAD_URL
+from gh_release_install.metrics import (
+    Metrics,
+    write_metrics_json,
+    write_prometheus_textfile,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +54,14 @@ parser.add_argument(
             extracted file instead. May contain variables such as '{version}' or
             '{tag}'.""",
 )
+parser.add_argument(
+    "--remote-extract",
+    action="store_true",
+    help="""Fetch only the --extract <filename> out of a zip ASSET, using HTTP range
+            requests, instead of downloading the whole archive. Falls back to a full
+            download when the server does not support range requests. The
+            --checksum then verifies the extracted file instead of the ASSET.""",
+)
 parser.add_argument(
     "destination",
     metavar="DESTINATION",
@@ -67,7 +87,9 @@ parser.add_argument(
     metavar="<hash>:<digest|asset>",
     help=f"""Asset checksum used to verify the downloaded ASSET. <hash> can be one of
              {', '.join(HASH_ALGORITHM)}. <digest|asset> can either be the expected
-             checksum, or the filename of an checksum file in the release assets.""",
+             checksum, or the filename of an checksum file in the release assets.
+             <hash> may be omitted when passing the expected checksum. A checksum
+             file must list the ASSET with the <hash> algorithm.""",
 )
 parser.add_argument(
     "--owner",
@@ -84,22 +106,115 @@ parser.add_argument(
     metavar="<mode>",
     help="""Permissions of the DESTINATION file. Defaults to 755.""",
 )
-parser.add_argument(
-    "-v",
-    "--verbose",
-    dest="verbosity",
-    action="count",
-    default=0,
-    help="Increase the verbosity.",
-)
-parser.add_argument(
-    "-q",
-    "--quiet",
-    dest="verbosity",
-    action="store_const",
-    const=-1,
-    help="Disable logging.",
-)
+
+
+def add_url_arguments(command_parser: ArgumentParser):
+    command_parser.add_argument(
+        "--api-url",
+        dest="api_urls",
+        metavar="<url>",
+        action="append",
+        help=f"""Base url of the Github API, e.g. of a Github Enterprise server or a
+                 mirror. May be repeated, the urls are tried in order until one
+                 answers. Defaults to {GITHUB_API_URL}.""",
+    )
+    command_parser.add_argument(
+        "--download-url",
+        dest="download_urls",
+        metavar="<url>",
+        action="append",
+        help=f"""Base url of the release downloads, serving the
+                 <base>/REPOSITORY/releases/download/<tag>/ASSET paths. May be
+                 repeated, the urls are tried in order until one answers. Defaults
+                 to {GITHUB_DOWNLOAD_URL}.""",
+    )
+
+
+def add_installer_arguments(command_parser: ArgumentParser):
+    command_parser.add_argument(
+        "--cache-dir",
+        metavar="<directory>",
+        type=Path,
+        help="""Cache the downloaded assets in <directory>, and reuse them instead of
+                downloading them again. Disabled when not set.""",
+    )
+    command_parser.add_argument(
+        "--cache-max-size",
+        metavar="<size>",
+        type=parse_size,
+        help="""Maximum size of the cache, e.g. '500M' or '2G'. The least recently
+                used assets are evicted first. Unlimited when not set.""",
+    )
+    command_parser.add_argument(
+        "--latest-ttl",
+        metavar="<seconds>",
+        type=float,
+        help="""Reuse the 'latest' version resolved less than <seconds> ago without
+                querying the Github API. Requires --cache-dir. When not set, the
+                Github API is queried using a conditional request.""",
+    )
+    command_parser.add_argument(
+        "--connections",
+        metavar="<count>",
+        type=int,
+        default=DEFAULT_CONNECTIONS,
+        help="""Number of concurrent connections used to download large assets, when
+                the server supports range requests.""",
+    )
+    add_url_arguments(command_parser)
+    command_parser.add_argument(
+        "--metrics-json",
+        metavar="<filename>",
+        type=Path,
+        help="""Write the install timings per phase, transferred bytes, retries and
+                cache hits to <filename> as JSON.""",
+    )
+    command_parser.add_argument(
+        "--metrics-textfile",
+        metavar="<filename>",
+        type=Path,
+        help="""Write the install metrics to <filename> in the Prometheus text format,
+                e.g. for the node exporter textfile collector.""",
+    )
+
+
+def installer_options(args: Namespace) -> dict[str, Any]:
+    return {
+        "cache_dir": args.cache_dir,
+        "cache_max_size": args.cache_max_size,
+        "latest_ttl": args.latest_ttl,
+        "connections": args.connections,
+        "api_urls": args.api_urls,
+        "download_urls": args.download_urls,
+    }
+
+
+def write_metrics(args: Namespace, runs: list[Metrics]):
+    if args.metrics_json is not None:
+        write_metrics_json(args.metrics_json, runs)
+    if args.metrics_textfile is not None:
+        write_prometheus_textfile(args.metrics_textfile, runs)
+
+
+def add_verbosity_arguments(command_parser: ArgumentParser):
+    command_parser.add_argument(
+        "-v",
+        "--verbose",
+        dest="verbosity",
+        action="count",
+        default=0,
+        help="Increase the verbosity.",
+    )
+    command_parser.add_argument(
+        "-q",
+        "--quiet",
+        dest="verbosity",
+        action="store_const",
+        const=-1,
+        help="Disable logging.",
+    )
+
+
 parser.epilog = """
 template variables:
     {tag}               Release tag name.
@@ -119,30 +234,243 @@ examples:
         '/usr/local/bin/prometheus' \\
         --version-file '{destination}.version' \\
         --checksum 'sha256:sha256sums.txt'
+
+commands:
+    gh-release-install batch MANIFEST
+                        Install all the entries of a JSON or TOML manifest
+                        concurrently, see 'gh-release-install batch --help'.
+    gh-release-install audit [MANIFEST]
+                        Verify the installed files against their expected
+                        checksums, see 'gh-release-install audit --help'.
+    gh-release-install cache {stats,prune}
+                        Show the download cache statistics or evict cached
+                        assets, see 'gh-release-install cache --help'.
 """
+add_installer_arguments(parser)
+add_verbosity_arguments(parser)
 
+batch_parser = ArgumentParser(
+    prog="gh-release-install batch",
+    description="Install many GitHub release files concurrently from a manifest.",
+    formatter_class=lambda prog: ArgumentParserFormatter(prog, width=80),
+)
+batch_parser.add_argument(
+    "manifest",
+    metavar="MANIFEST",
+    type=Path,
+    help="""JSON list of objects, or TOML list of [[install]] tables, accepting the
+            same fields as the installer: repository, asset, destination, extract,
+            remote_extract, version, version_file, checksum, owner, group and
+            mode.""",
+)
+batch_parser.add_argument(
+    "--workers",
+    default=4,
+    type=int,
+    metavar="<count>",
+    help="Number of installs running concurrently.",
+)
+batch_parser.add_argument(
+    "--check",
+    action="store_true",
+    help="""Only check which entries are not installed in their target version, and
+            exit with a non zero status if any.""",
+)
+add_installer_arguments(batch_parser)
+add_verbosity_arguments(batch_parser)
+batch_parser.epilog = """
+example manifest:
+    [[install]]
+    repository = "mvdan/sh"
+    asset = "shfmt_{tag}_linux_amd64"
+    destination = "/usr/local/bin/shfmt"
+    version_file = "{destination}.version"
+"""
 
-def run():
-    args = parser.parse_args()
+audit_parser = ArgumentParser(
+    prog="gh-release-install audit",
+    description="""Verify that the installed files did not drift from their expected
+                   checksums, hashing the files concurrently on many processes.""",
+    formatter_class=lambda prog: ArgumentParserFormatter(prog, width=80),
+)
+audit_parser.add_argument(
+    "manifest",
+    metavar="MANIFEST",
+    type=Path,
+    nargs="?",
+    help="""Audit the entries of a batch MANIFEST, using their checksum, or their
+            recorded digest when the checksum does not apply to the installed file.
+            When not set, audit the installs recorded in the cache directory.""",
+)
+audit_parser.add_argument(
+    "--cache-dir",
+    metavar="<directory>",
+    type=Path,
+    default=DEFAULT_CACHE_DIR,
+    help="Cache directory, where the installs are recorded.",
+)
+audit_parser.add_argument(
+    "--workers",
+    type=int,
+    metavar="<count>",
+    help="Number of files hashed concurrently. Defaults to the number of CPUs.",
+)
+audit_parser.add_argument(
+    "--json",
+    action="store_true",
+    help="Print the results as JSON.",
+)
+add_url_arguments(audit_parser)
+add_verbosity_arguments(audit_parser)
 
-    if args.verbosity is not None and args.verbosity >= 0:
+cache_parser = ArgumentParser(
+    prog="gh-release-install cache",
+    description="Manage the downloaded assets cache.",
+    formatter_class=lambda prog: ArgumentParserFormatter(prog, width=80),
+)
+cache_parser.add_argument(
+    "action",
+    choices=["stats", "prune"],
+    help="""Show the cache statistics, or evict the least recently used assets until
+            the cache is smaller than --max-size.""",
+)
+cache_parser.add_argument(
+    "--cache-dir",
+    metavar="<directory>",
+    type=Path,
+    default=DEFAULT_CACHE_DIR,
+    help="Cache directory.",
+)
+cache_parser.add_argument(
+    "--max-size",
+    metavar="<size>",
+    type=parse_size,
+    default=0,
+    help="Size to prune the cache to, e.g. '500M' or '2G'.",
+)
+add_verbosity_arguments(cache_parser)
+
+
+def setup_logging(verbosity: int | None):
+    if verbosity is not None and verbosity >= 0:
         levels = [logging.ERROR, logging.INFO, logging.DEBUG]
         logging.basicConfig(
-            level=levels[min(args.verbosity, 2)],
+            level=levels[min(verbosity, 2)],
             format="%(levelname)s:\t%(message)s",
         )
 
+
+def run_batch_command(argv: list[str]):
+    # pylint: disable=import-outside-toplevel
+    from gh_release_install.batch import check_batch, load_manifest, run_batch
+
+    args = batch_parser.parse_args(argv)
+    setup_logging(args.verbosity)
+
+    try:
+        entries = load_manifest(args.manifest)
+    # pylint: disable=broad-except
+    except Exception as exception:
+        logger.exception(exception)
+        sys.exit(1)
+
+    if args.check:
+        results = check_batch(entries, **installer_options(args))
+        for result in results:
+            if not result.ok:
+                print(f"{result.name}: {result.error}")
+    else:
+        results = run_batch(entries, workers=args.workers, **installer_options(args))
+        write_metrics(
+            args, [result.metrics for result in results if result.metrics is not None]
+        )
+
+    failed = [result for result in results if not result.ok]
+    logger.info("Succeeded %d/%d entries", len(results) - len(failed), len(results))
+    if failed:
+        sys.exit(1)
+
+
+def run_audit_command(argv: list[str]):
+    # pylint: disable=import-outside-toplevel
+    from gh_release_install.audit import audit, manifest_targets, recorded_targets
+    from gh_release_install.batch import load_manifest
+
+    args = audit_parser.parse_args(argv)
+    setup_logging(args.verbosity)
+
+    cache = Cache(args.cache_dir)
+    try:
+        if args.manifest is not None:
+            targets = manifest_targets(
+                load_manifest(args.manifest),
+                cache,
+                cache_dir=args.cache_dir,
+                api_urls=args.api_urls,
+                download_urls=args.download_urls,
+            )
+        else:
+            targets = recorded_targets(cache)
+    # pylint: disable=broad-except
+    except Exception as exception:
+        logger.exception(exception)
+        sys.exit(1)
+
+    results = audit(targets, workers=args.workers)
+    if args.json:
+        print(json.dumps([result.to_dict() for result in results], indent=2))
+    else:
+        for result in results:
+            print(f"{result.destination}: {result.status}")
+
+    failed = [result for result in results if not result.ok]
+    logger.info("Verified %d/%d files", len(results) - len(failed), len(results))
+    if failed:
+        sys.exit(1)
+
+
+def run_cache_command(argv: list[str]):
+    args = cache_parser.parse_args(argv)
+    setup_logging(args.verbosity)
+
+    cache = Cache(args.cache_dir)
+    if args.action == "prune":
+        evicted = cache.prune(args.max_size)
+        logger.info("Evicted %d cached assets", len(evicted))
+
+    for key, value in cache.stats().items():
+        print(f"{key}: {value}")
+
+
+COMMANDS = {
+    "audit": run_audit_command,
+    "batch": run_batch_command,
+    "cache": run_cache_command,
+}
+
+
+def run():
+    argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+        return
+
+    args = parser.parse_args(argv)
+    setup_logging(args.verbosity)
+
     installer = GhReleaseInstall(
         repository=args.repository,
         asset=args.asset,
         destination=args.destination,
         extract=args.extract,
+        remote_extract=args.remote_extract,
         version=args.version,
         version_file=args.version_file,
         checksum=args.checksum,
         owner=args.owner,
         group=args.group,
         mode=args.mode,
+        **installer_options(args),
     )
 
     try:
@@ -151,3 +479,5 @@ def run():
     except Exception as exception:
         logger.exception(exception)
         sys.exit(1)
+    finally:
+        write_metrics(args, [installer.metrics])
@@ -0,0 +1,448 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPException, HTTPResponse, IncompleteRead
+from pathlib import Path
+from shutil import move
+from threading import Lock
+from typing import TYPE_CHECKING, Iterator
+from urllib.parse import urlsplit
+
+from .checksum import update_file_checksum
+
+if TYPE_CHECKING:
+    from requests import Response, Session
+
+__all__ = [
+    "DEFAULT_CONNECTIONS",
+    "Download",
+    "download",
+    "iter_response",
+    "parse_content_range",
+    "range_headers",
+    "resumable_errors",
+]
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECTIONS = 4
+CHUNK_SIZE = 1024 * 1024
+
+# Bounds of the read buffer, grown while the reads fill it, so slow transfers do
+# not hold a large buffer and fast transfers need few reads.
+MIN_BUFFER_SIZE = 64 * 1024
+MAX_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Below this size, the extra requests cost more than they save.
+SEGMENTED_MIN_SIZE = 64 * 1024 * 1024
+
+# Number of times an interrupted transfer is resumed before giving up.
+RESUME_ATTEMPTS = 5
+
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+class RangeNotSupported(Exception):
+    pass
+
+
+def resumable_errors() -> tuple[type[Exception], ...]:
+    """
+    Errors interrupting a transfer, after which the transfer may be resumed.
+    """
+    # pylint: disable=import-outside-toplevel
+    from requests import exceptions
+
+    return (exceptions.ChunkedEncodingError, exceptions.ConnectionError)
+
+
+def _body_file(res: Response) -> HTTPResponse | None:
+    """
+    Standard library response the body of a streamed response can be read from
+    directly, i.e. when the body is not encoded and urllib3 did not read it yet.
+    """
+    fp = getattr(res.raw, "_fp", None)
+    if not isinstance(fp, HTTPResponse) or fp.isclosed():
+        return None
+    if res.headers.get("Content-Encoding", "identity") != "identity":
+        return None
+    if not callable(getattr(res.raw, "release_conn", None)):
+        return None
+    return fp
+
+
+def iter_response(res: Response) -> Iterator[memoryview]:
+    """
+    Iterate over the body of a streamed response, reading it into a reusable buffer
+    instead of allocating a new chunk for each read. The yielded views are only valid
+    until the next iteration.
+
+    Falls back to `iter_content` chunks when the body can't be read directly.
+    """
+    fp = _body_file(res)
+    if fp is None:
+        for chunk in res.iter_content(chunk_size=CHUNK_SIZE):
+            yield memoryview(chunk)
+        return
+
+    # pylint: disable=import-outside-toplevel
+    from requests import exceptions
+
+    buffer = memoryview(bytearray(MIN_BUFFER_SIZE))
+    while True:
+        try:
+            size = fp.readinto(buffer)
+            # The standard library response ends a truncated body silently.
+            if not size and fp.length:
+                raise IncompleteRead(b"", fp.length)
+        except (OSError, HTTPException) as exception:
+            raise exceptions.ChunkedEncodingError(exception) from exception
+        if not size:
+            break
+
+        yield buffer[:size]
+
+        if size == len(buffer) and len(buffer) < MAX_BUFFER_SIZE:
+            buffer = memoryview(bytearray(len(buffer) * 2))
+
+    # The body was read past urllib3, hand the connection back to its pool.
+    res.raw.release_conn()
+
+
+def _pwrite(fd: int, data: memoryview, offset: int):
+    while data:
+        written = os.pwrite(fd, data, offset)
+        data, offset = data[written:], offset + written
+
+
+def parse_content_range(res: Response) -> tuple[int, int, int] | None:
+    """
+    Parse the start, end and complete length of a partial content response.
+    """
+    match = CONTENT_RANGE_RE.search(res.headers.get("Content-Range", ""))
+    if match is None:
+        return None
+    start, end, length = match.groups()
+    return int(start), int(end), int(length)
+
+
+def _validator(res: Response) -> dict:
+    """
+    Record the response validators, used to resume the download later.
+    """
+    return {
+        "url": res.url,
+        "etag": res.headers.get("ETag"),
+        "last_modified": res.headers.get("Last-Modified"),
+        "length": int(res.headers.get("Content-Length", 0)),
+        "ranges": (
+            res.headers.get("Accept-Ranges") == "bytes"
+            and "Content-Encoding" not in res.headers
+        ),
+    }
+
+
+def _if_range(validator: dict) -> dict[str, str]:
+    # Weak entity tags can't be used to resume a download.
+    etag = validator.get("etag")
+    if etag and not etag.startswith("W/"):
+        return {"If-Range": etag}
+    if validator.get("last_modified"):
+        return {"If-Range": validator["last_modified"]}
+    return {}
+
+
+def _is_resumable(validator: dict | None) -> bool:
+    return bool(validator and validator["ranges"] and validator["length"] > 0)
+
+
+def range_headers(url: str, resolved_url: str, start: int, end: int) -> dict:
+    """
+    Headers requesting a range of the resolved url of a redirected url.
+    """
+    headers: dict[str, str | None] = {"Range": f"bytes={start}-{end}"}
+    # Do not leak the credentials to the host we were redirected to, the same way
+    # requests strips them when following the redirect.
+    if urlsplit(url).hostname != urlsplit(resolved_url).hostname:
+        headers["Authorization"] = None
+    return headers
+
+
+# pylint: disable=too-few-public-methods,too-many-instance-attributes
+class Download:
+    """
+    Download a file, using concurrent range requests when the server supports them
+    and the file is large enough, or a single stream otherwise.
+
+    Interrupted transfers are resumed using range requests. When a partial file
+    path is given, the partial download and its validators are kept there, so a
+    later download of the same file can resume it.
+    """
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        session: Session,
+        url: str,
+        filepath: Path,
+        mixer=None,
+        connections: int = DEFAULT_CONNECTIONS,
+        partial: Path | None = None,
+    ) -> None:
+        self.session = session
+        self.url = url
+        self.filepath = filepath
+        self.mixer = mixer
+        self.connections = connections
+        self.partial = partial
+
+        self.validator: dict | None = None
+        self._resumable_errors = resumable_errors()
+
+        # Transfer statistics, across all the requests.
+        self.downloaded = 0
+        self.resumes = 0
+        self._stats_lock = Lock()
+
+    def _count(self, downloaded: int = 0, resumes: int = 0):
+        with self._stats_lock:
+            self.downloaded += downloaded
+            self.resumes += resumes
+
+    @property
+    def _target(self) -> Path:
+        return self.partial if self.partial is not None else self.filepath
+
+    @property
+    def _validator_path(self) -> Path | None:
+        if self.partial is None:
+            return None
+        return self.partial.with_name(f"{self.partial.name}.json")
+
+    def _load_partial(self) -> int:
+        """
+        Load a previous partial download, and return its size.
+        """
+        validator_path = self._validator_path
+        if self.partial is None or validator_path is None or not self.partial.is_file():
+            return 0
+        try:
+            self.validator = json.loads(validator_path.read_text("utf-8"))
+        except (OSError, ValueError):
+            return 0
+        size = self.partial.stat().st_size
+        if not _is_resumable(self.validator) or size >= self.validator["length"]:
+            return 0
+        # Without a validator, the file may have changed since the previous run, and
+        # the resumed download would splice two different files.
+        if not _if_range(self.validator):
+            return 0
+        return size
+
+    def _save_validator(self):
+        if self._validator_path is not None:
+            self._validator_path.parent.mkdir(parents=True, exist_ok=True)
+            self._validator_path.write_text(json.dumps(self.validator), "utf-8")
+
+    def _discard_validator(self):
+        if self._validator_path is not None:
+            self._validator_path.unlink(missing_ok=True)
+
+    def _request(self, offset: int = 0) -> Response:
+        headers = {}
+        if offset > 0:
+            assert self.validator is not None
+            headers = {"Range": f"bytes={offset}-", **_if_range(self.validator)}
+
+        res = self.session.get(self.url, headers=headers, stream=True)
+        try:
+            res.raise_for_status()
+        except Exception:
+            res.close()
+            raise
+        return res
+
+    def _is_continuation(self, res: Response, offset: int) -> bool:
+        assert self.validator is not None
+        content_range = parse_content_range(res)
+        return (
+            res.status_code == 206
+            and content_range is not None
+            and content_range[0] == offset
+            and content_range[2] == self.validator["length"]
+        )
+
+    def _stream(self, res: Response, offset: int):
+        with self._target.open("r+b" if offset > 0 else "wb") as file:
+            file.seek(offset)
+            file.truncate()
+
+            for attempt in range(RESUME_ATTEMPTS + 1):
+                try:
+                    for chunk in iter_response(res):
+                        file.write(chunk)
+                        offset += len(chunk)
+                        self._count(downloaded=len(chunk))
+                        if self.mixer is not None:
+                            self.mixer.update(chunk)
+                    return
+                except self._resumable_errors as exception:
+                    if attempt == RESUME_ATTEMPTS or not _is_resumable(self.validator):
+                        raise
+                    logger.warning(
+                        "Download interrupted after %d bytes, resuming: %s",
+                        offset,
+                        exception,
+                    )
+                    self._count(resumes=1)
+                finally:
+                    res.close()
+
+                file.flush()
+                res = self._request(offset)
+                if offset > 0 and not self._is_continuation(res, offset):
+                    res.close()
+                    raise OSError(f"unable to resume the download of {self.url}")
+
+    def _download_segment(self, resolved_url: str, fd: int, start: int, end: int):
+        offset = start
+        for attempt in range(RESUME_ATTEMPTS + 1):
+            headers = range_headers(self.url, resolved_url, offset, end)
+            try:
+                with self.session.get(
+                    resolved_url, headers=headers, stream=True
+                ) as res:
+                    res.raise_for_status()
+                    if res.status_code != 206:
+                        raise RangeNotSupported(
+                            f"range request returned {res.status_code}"
+                        )
+
+                    for chunk in iter_response(res):
+                        _pwrite(fd, chunk, offset)
+                        offset += len(chunk)
+                        self._count(downloaded=len(chunk))
+                break
+            except self._resumable_errors as exception:
+                if attempt == RESUME_ATTEMPTS:
+                    raise
+                logger.warning(
+                    "Segment %d-%d interrupted, resuming: %s", start, end, exception
+                )
+                self._count(resumes=1)
+
+        if offset != end + 1:
+            raise OSError(
+                f"incomplete segment {start}-{end}, got {offset - start} bytes"
+            )
+
+    def _download_segments(self, resolved_url: str, size: int):
+        segment_size = -(-size // self.connections)
+        segments = [
+            (start, min(start + segment_size, size) - 1)
+            for start in range(0, size, segment_size)
+        ]
+        logger.debug("Downloading %d bytes in %d segments", size, len(segments))
+
+        fd = os.open(self._target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(fd, 0, size)
+            else:
+                os.ftruncate(fd, size)
+
+            with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+                futures = [
+                    executor.submit(
+                        self._download_segment, resolved_url, fd, start, end
+                    )
+                    for start, end in segments
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            os.close(fd)
+
+    def _use_segments(self) -> bool:
+        assert self.validator is not None
+        return (
+            self.connections > 1
+            and self.validator["length"] >= SEGMENTED_MIN_SIZE
+            and _is_resumable(self.validator)
+        )
+
+    def _finish(self):
+        if self.partial is not None:
+            # The partial file may be on another filesystem
+            move(self.partial, self.filepath)
+            self._discard_validator()
+
+    def run(self):
+        offset = self._load_partial()
+
+        res = self._request(offset)
+        with res:
+            if offset > 0 and self._is_continuation(res, offset):
+                logger.info("Resuming download after %d bytes", offset)
+                if self.mixer is not None:
+                    # Hash the previously downloaded part from disk.
+                    update_file_checksum(self.mixer, self._target)
+            else:
+                offset = 0
+                self.validator = _validator(res)
+                self._save_validator()
+
+                if self._use_segments():
+                    # Drop this response body, the segments are downloaded from the
+                    # url we were redirected to.
+                    res.close()
+                    self._run_segments(res.url)
+                    return
+
+            self._stream(res, offset)
+
+        self._finish()
+
+    def _run_segments(self, resolved_url: str):
+        assert self.validator is not None
+
+        # A preallocated file with holes can't be resumed in a later run.
+        self._discard_validator()
+        try:
+            self._download_segments(resolved_url, self.validator["length"])
+        except RangeNotSupported as exception:
+            logger.debug("Falling back to a single stream download: %s", exception)
+            self._save_validator()
+            self._stream(self._request(), 0)
+            self._finish()
+            return
+
+        self._finish()
+
+        # The segments are written out of order, hash the file once complete.
+        if self.mixer is not None:
+            update_file_checksum(self.mixer, self.filepath)
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+def download(
+    session: Session,
+    url: str,
+    filepath: Path,
+    mixer=None,
+    connections: int = DEFAULT_CONNECTIONS,
+    partial: Path | None = None,
+) -> Download:
+    """
+    Download a file, see `Download`. Returns the download, holding the transfer
+    statistics.
+
+    When a hash object is given, it is fed with the file content.
+    """
+    result = Download(session, url, filepath, mixer, connections, partial)
+    result.run()
+    return result
@@ -1,31 +1,58 @@
 from __future__ import annotations
 
 import logging
+import os
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor
 from os import environ
 from pathlib import Path
 from shutil import chown, move, unpack_archive
 from tempfile import TemporaryDirectory
+from threading import Lock
+from time import perf_counter, time
+from typing import TYPE_CHECKING, Any, Callable, Sequence, TypeVar
 
-from requests import Session
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-
+from .cache import CACHE_ALGORITHM, Cache, clone_file
 from .checksum import (
     compute_file_checksum,
-    find_checksum_in_file,
+    get_checksum_file,
     is_hexdigest,
+    lookup_checksum,
+    new_checksum,
     parse_checksum_option,
+    update_file_checksum,
 )
-from .unpack import register_unpack_formats
+from .download import DEFAULT_CONNECTIONS
+from .metrics import Metrics
+
+# The HTTP and archive modules are imported when needed, so the common case of an
+# already installed version exits without loading them.
+if TYPE_CHECKING:
+    from requests import Session
 
-__all__ = ["GhReleaseInstall"]
+__all__ = ["GhReleaseInstall", "get_latest_tag", "new_session"]
 
 LATEST = "latest"
 
+GITHUB_API_URL = "https://api.github.com"
+GITHUB_DOWNLOAD_URL = "https://github.com"
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+T = TypeVar("T")
+
+# Checksum files are fetched in the background while the asset downloads, and kept
+# per urls, i.e. per repository and tag, so installing many assets from the same
+# release fetches them once.
+CHECKSUM_FILES_CACHE_SIZE = 128
+_checksum_files: dict[tuple[str, ...], Future[dict[str, dict[str, str]] | None]] = {}
+_checksum_files_lock = Lock()
+_checksum_files_executor = ThreadPoolExecutor(
+    max_workers=4,
+    thread_name_prefix="gh-release-install-checksum",
+)
+
 
 # pylint: disable=too-few-public-methods
 class Release:
@@ -37,22 +64,176 @@ class Release:
         return self.tag.strip("v")
 
 
-def get_latest_tag(session: Session, repository: str) -> str:
-    url = f"https://api.github.com/repos/{repository}/releases/latest"
-    with session.get(url) as res:
-        res.raise_for_status()
-        body = res.json()
+def _new_mixer(algorithm: str | None):
+    return new_checksum(algorithm) if algorithm is not None else None
+
+
+def base_urls(urls: Sequence[str] | None, default: str) -> tuple[str, ...]:
+    """
+    Normalize a list of base urls tried in order, e.g. a local mirror first and
+    Github second.
+    """
+    return tuple(url.rstrip("/") for url in urls or (default,))
+
+
+def new_session(
+    pool_maxsize: int = 10,
+    api_urls: Sequence[str] | None = None,
+) -> Session:
+    """
+    Create a HTTP session with retries and Github authentication, the session may be
+    shared between multiple installers.
+    """
+    # pylint: disable=import-outside-toplevel
+    from requests import Session
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    from .auth import TokenAuth, github_hosts
+    from .ratelimit import RateLimitAdapter
+
+    api_urls = base_urls(api_urls, GITHUB_API_URL)
+    session = Session()
+    max_retries = Retry(total=3, connect=3, backoff_factor=0.5)
+    for prefix in ("https://", "http://"):
+        session.mount(
+            prefix,
+            HTTPAdapter(max_retries=max_retries, pool_maxsize=pool_maxsize),
+        )
+    # The requests to each API share a single rate limit budget. The rate limited
+    # requests are retried by the adapter, only retry the connection errors here.
+    api_max_retries = Retry(
+        total=3,
+        connect=3,
+        read=0,
+        status=0,
+        respect_retry_after_header=False,
+        backoff_factor=0.5,
+    )
+    for api_url in api_urls:
+        session.mount(
+            f"{api_url}/",
+            RateLimitAdapter(max_retries=api_max_retries, pool_maxsize=pool_maxsize),
+        )
+
+    if "GITHUB_TOKEN" in environ:
+        logger.debug("Loading GITHUB_TOKEN from env")
+        session.auth = TokenAuth(environ["GITHUB_TOKEN"], github_hosts(api_urls))
+
+    return session
+
+
+def with_fallbacks(urls: Sequence[str], func: Callable[[str], T]) -> T:
+    """
+    Call func with each base url in order, until a call does not fail with an I/O
+    error, e.g. a connection or HTTP error.
+    """
+    for index, url in enumerate(urls):
+        try:
+            return func(url)
+        except OSError as exception:
+            if index == len(urls) - 1:
+                raise
+            logger.warning(
+                "Request to '%s' failed, falling back to '%s': %s",
+                url,
+                urls[index + 1],
+                exception,
+            )
 
-    return body["tag_name"]
+    raise ValueError("no base url given")
+
+
+def get_latest_tag(
+    session: Session,
+    repository: str,
+    cache: Cache | None = None,
+    ttl: float | None = None,
+    api_urls: Sequence[str] = (GITHUB_API_URL,),
+) -> str:
+    """
+    Get the latest release tag of a repository, from the first of the api urls
+    answering.
+
+    When a cache is given, the previous response validators are sent with the
+    request, and a 304 response, which does not count against the API rate limit,
+    reuses the cached tag. Within the ttl, the cached tag is used without any request,
+    and processes sharing the cache resolve the tag once while the others wait.
+    """
+    if cache is None or ttl is None:
+        return _get_latest_tag(session, repository, cache, ttl, api_urls)
+
+    with cache.lock("latest", repository):
+        return _get_latest_tag(session, repository, cache, ttl, api_urls)
+
+
+def _get_latest_tag(
+    session: Session,
+    repository: str,
+    cache: Cache | None,
+    ttl: float | None,
+    api_urls: Sequence[str],
+) -> str:
+    latest = cache.get_latest(repository) if cache is not None else None
+
+    headers = {}
+    if latest is not None:
+        if ttl is not None and time() - latest["checked_at"] < ttl:
+            logger.debug("Using cached latest tag for '%s'", repository)
+            return latest["tag"]
+
+        if latest.get("etag"):
+            headers["If-None-Match"] = latest["etag"]
+        if latest.get("last_modified"):
+            headers["If-Modified-Since"] = latest["last_modified"]
+
+    def fetch(api_url: str) -> str:
+        url = f"{api_url}/repos/{repository}/releases/latest"
+        with session.get(url, headers=headers) as res:
+            etag = res.headers.get("ETag")
+            last_modified = res.headers.get("Last-Modified")
+            if res.status_code == 304 and latest is not None:
+                logger.debug("Latest release for '%s' did not change", repository)
+                tag = latest["tag"]
+                # A not modified response may omit the validators.
+                etag = etag or latest.get("etag")
+                last_modified = last_modified or latest.get("last_modified")
+            else:
+                res.raise_for_status()
+                release = res.json()
+                tag = release["tag_name"]
+                # The latest release response lists the assets of the release.
+                if "assets" in release:
+                    # pylint: disable=import-outside-toplevel,cyclic-import
+                    from .releases import parse_release_assets, remember_release_assets
+
+                    remember_release_assets(
+                        repository, tag, parse_release_assets(release), cache
+                    )
+
+            if cache is not None:
+                cache.put_latest(
+                    repository,
+                    {
+                        "tag": tag,
+                        "etag": etag,
+                        "last_modified": last_modified,
+                        "checked_at": time(),
+                    },
+                )
+
+        return tag
+
+    return with_fallbacks(api_urls, fetch)
 
 
 # pylint: disable=too-many-instance-attributes
 class GhReleaseInstall:
     _target: Release | None = None
     _local: Release | None = None
-    _session: Session
+    _session: Session | None
 
-    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
     def __init__(
         self,
         repository: str,
@@ -65,11 +246,25 @@ class GhReleaseInstall:
         owner: str | None = None,
         group: str | None = None,
         mode: str | None = None,
+        session: Session | None = None,
+        cache_dir: str | Path | None = None,
+        cache_max_size: int | None = None,
+        latest_ttl: float | None = None,
+        connections: int = DEFAULT_CONNECTIONS,
+        metrics_callback: Callable[[Metrics], None] | None = None,
+        api_urls: Sequence[str] | None = None,
+        download_urls: Sequence[str] | None = None,
+        remote_extract: bool = False,
     ):
         self._repository = repository
         self._asset = asset
         self._destination = str(destination)
         self._extract = extract
+        self._remote_extract = remote_extract
+        if remote_extract and (extract is None or not asset.endswith(".zip")):
+            raise ValueError(
+                "remote extract requires a zip asset and a file to extract"
+            )
         self._version = version
         self._version_file = version_file
 
@@ -81,16 +276,29 @@ class GhReleaseInstall:
         self._group = group
         self._mode = mode
 
-        self._session = Session()
-        max_retries = Retry(total=3, connect=3, backoff_factor=0.5)
-        self._session.mount("https://", HTTPAdapter(max_retries=max_retries))
+        self._session = session
 
-        if "GITHUB_TOKEN" in environ:
-            logger.debug("Loading GITHUB_TOKEN from env")
-            github_token = environ.get("GITHUB_TOKEN")
-            self._session.headers.update({"Authorization": f"token {github_token}"})
+        self._cache = None
+        if cache_dir is not None:
+            self._cache = Cache(cache_dir, max_size=cache_max_size)
+        self._latest_ttl = latest_ttl
+        self._connections = connections
 
-        register_unpack_formats()
+        # Base urls tried in order, e.g. a local mirror first and Github second.
+        self._api_urls = base_urls(api_urls, GITHUB_API_URL)
+        self._download_urls = base_urls(download_urls, GITHUB_DOWNLOAD_URL)
+
+        self.metrics = Metrics(repository, asset, self._destination)
+        self._metrics_callback = metrics_callback
+
+    @property
+    def session(self) -> Session:
+        """
+        HTTP session, created on first use.
+        """
+        if self._session is None:
+            self._session = new_session(api_urls=self._api_urls)
+        return self._session
 
     def _resolve_path(self, path: str, **variables: str) -> str:
         if self._target is not None:
@@ -130,22 +338,39 @@ class GhReleaseInstall:
             )
         )
 
+    @property
+    def target_version(self) -> str | None:
+        if self._target is None:
+            return None
+        return self._target.tag
+
     @property
     def checksum(self) -> str | None:
         if self._checksum is None:
             return None
         return self._resolve_path(self._checksum)
 
-    def _github_asset_url(self, asset: str) -> str:
+    def _asset_urls(self, asset: str) -> tuple[str, ...]:
         assert self._target is not None
-        return f"https://github.com/{self._repository}/releases/download/{self._target.tag}/{asset}"
+        return tuple(
+            f"{download_url}/{self._repository}/releases/download/{self._target.tag}/{asset}"
+            for download_url in self._download_urls
+        )
 
     def _get_target_version(self):
         """
         If not provided, get latest tag/version from the Github repository.
         """
         if self._version == LATEST:
-            self._target = Release(get_latest_tag(self._session, self._repository))
+            self._target = Release(
+                get_latest_tag(
+                    self.session,
+                    self._repository,
+                    cache=self._cache,
+                    ttl=self._latest_ttl,
+                    api_urls=self._api_urls,
+                )
+            )
         else:
             self._target = Release(self._version)
 
@@ -159,62 +384,427 @@ class GhReleaseInstall:
             self._local = Release(self.version_file.read_text(encoding="utf-8"))
             logger.debug("Local version is '%s'", self._local.version)
 
-    def _get_checksum_from_url(self, url: str) -> str | None:
+    def _fetch_checksum_file(
+        self,
+        urls: tuple[str, ...],
+        refresh: bool = False,
+    ) -> Future[dict[str, dict[str, str]] | None]:
+        """
+        Start downloading a checksum file in the background, unless it was already
+        fetched. A failed download is retried, and a missing file is looked up again
+        when refreshing, e.g. by a later install of the same release.
+        """
+        with _checksum_files_lock:
+            future = _checksum_files.get(urls)
+            if future is None or (
+                future.done()
+                and (future.exception() or refresh and future.result() is None)
+            ):
+                future = _checksum_files_executor.submit(
+                    get_checksum_file, self.session, urls
+                )
+                _checksum_files[urls] = future
+
+                if len(_checksum_files) > CHECKSUM_FILES_CACHE_SIZE:
+                    del _checksum_files[next(iter(_checksum_files))]
+
+        return future
+
+    @property
+    def _checksum_filename(self) -> str:
         """
-        Download checksum file from the provided url and extract the checksum.
+        Name of the verified file, the extracted file when it is fetched out of a
+        remote zip asset, the asset otherwise.
         """
-        with self._session.get(url) as res:
-            if res.status_code == 404:
-                return None
-            res.raise_for_status()
+        if self._remote_extract:
+            assert self.extract is not None
+            return self.extract
+        return self.asset
 
-            return find_checksum_in_file(res.text, self.asset)
+    def _get_checksum_from_urls(self, urls: tuple[str, ...]) -> str | None:
+        """
+        Download checksum file from the provided urls and extract the checksum, only
+        a digest of the checksum algorithm is accepted.
+        """
+        assert self.checksum_algorithm is not None
+        index = self._fetch_checksum_file(urls).result()
+        if index is None:
+            return None
 
-    def _verify_checksum(self, asset_file: Path) -> bool:
+        digest = lookup_checksum(
+            index, self._checksum_filename, self.checksum_algorithm
+        )
+        if digest is None:
+            logger.error(
+                "Checksum file does not list '%s' with the %s algorithm",
+                self._checksum_filename,
+                self.checksum_algorithm,
+            )
+        return digest
+
+    def _release_assets(self, refresh: bool = False) -> dict[str, dict] | None:
+        """
+        Assets index of the target release, when known from the latest release
+        response or the cache, so the index costs no extra API request. The index is
+        only fetched to refresh it.
+        """
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from .releases import fetch_release_assets, known_release_assets
+
+        assert self._target is not None
+        if not refresh:
+            return known_release_assets(self._repository, self._target.tag, self._cache)
+
+        try:
+            return fetch_release_assets(
+                self.session,
+                self._repository,
+                self._target.tag,
+                cache=self._cache,
+                api_urls=self._api_urls,
+            )
+        # pylint: disable=broad-except
+        except Exception as exception:
+            logger.warning("Failed to get the release assets: %s", exception)
+            return None
+
+    def _check_release_assets(self):
+        """
+        Fail fast when the asset or the checksum file is missing from the release
+        assets index, without downloading anything.
+        """
+        assert self._target is not None
+        names = [self.asset]
+        if self.checksum is not None and self.checksum_algorithm is not None:
+            if not is_hexdigest(self.checksum_algorithm, self.checksum):
+                names.append(self.checksum)
+
+        # An empty index is unknown, e.g. a mirror not listing the release assets.
+        assets = self._release_assets()
+        if not assets or all(name in assets for name in names):
+            return
+
+        # Assets may have been uploaded to the release since it was indexed.
+        assets = self._release_assets(refresh=True)
+        if not assets:
+            return
+
+        for name in names:
+            if name not in assets:
+                logger.error(
+                    "Asset '%s' not found in release '%s', available assets: %s",
+                    name,
+                    self._target.tag,
+                    ", ".join(sorted(assets)),
+                )
+                sys.exit(1)
+
+    def _prefetch_checksum(self):
+        """
+        Fetch a possible checksum file while the asset downloads.
+        """
+        if self.checksum is None or self.checksum_algorithm is None:
+            return
+        if is_hexdigest(self.checksum_algorithm, self.checksum):
+            return
+        self._fetch_checksum_file(self._asset_urls(self.checksum), refresh=True)
+
+    def _expected_checksum(self) -> str | None:
+        """
+        Get the expected asset checksum, either a possible hand written digest, or
+        a digest from a asset checksum file.
+        """
+        assert self.checksum is not None
+        assert self.checksum_algorithm is not None
+
+        # We hope nobody will ever pass a asset filename that matches this check
+        if is_hexdigest(self.checksum_algorithm, self.checksum):
+            return self.checksum
+
+        return self._get_checksum_from_urls(self._asset_urls(self.checksum))
+
+    def _verify_checksum(
+        self,
+        asset_file: Path,
+        local_checksum: str | None = None,
+    ) -> bool:
         """
         Verify asset checksum, first check against a possible hand written digest,
         then check against a digest from a asset checksum file.
+
+        The asset file is only read when the local checksum was not computed while
+        downloading.
         """
         assert self.checksum is not None
         assert self.checksum_algorithm is not None
 
-        local_checksum = compute_file_checksum(self.checksum_algorithm, asset_file)
+        if local_checksum is None:
+            local_checksum = compute_file_checksum(self.checksum_algorithm, asset_file)
 
-        # We hope nobody will ever pass a asset filename that matches this check
-        if is_hexdigest(self.checksum_algorithm, self.checksum):
-            return local_checksum == self.checksum
+        return local_checksum == self._expected_checksum()
+
+    def _destination_checksum(self) -> str:
+        assert self.checksum_algorithm is not None
+        if self._cache is not None:
+            return self._cache.file_checksum(self.checksum_algorithm, self.destination)
+        return compute_file_checksum(self.checksum_algorithm, self.destination)
+
+    def _is_destination_verified(self) -> bool:
+        """
+        Check whether the destination file already matches the expected asset
+        checksum. Extracted files can't be compared with the asset checksum, unless
+        the checksum is the extracted file checksum.
+        """
+        if self.checksum is None:
+            return False
+        if self.extract is not None and not self._remote_extract:
+            return False
+        if not self.destination.is_file():
+            return False
+
+        expected = self._expected_checksum()
+        if expected is None:
+            return False
 
-        target_checksum_url = self._github_asset_url(self.checksum)
-        target_checksum = self._get_checksum_from_url(target_checksum_url)
-        return local_checksum == target_checksum
+        return self._destination_checksum() == expected
 
-    def _download_release_asset(self, tmp_dir: Path):
+    def _copy_cached_asset(self, tmp_file: Path, mixer=None) -> bool:
+        """
+        Copy the asset from the cache, returns whether the asset was cached.
+        """
+        assert self._target is not None
+        if self._cache is None:
+            return False
+
+        cached = self._cache.get(self._repository, self._target.tag, self.asset)
+        if cached is None:
+            return False
+
+        logger.info("Using cached asset '%s'", cached)
+        self.metrics.cache_hit = True
+        clone_file(cached, tmp_file)
+        if mixer is not None:
+            update_file_checksum(mixer, tmp_file)
+        return True
+
+    def _fetch_release_asset(self, tmp_file: Path, algorithm: str | None = None):
+        """
+        Download the asset from the first download url serving it, and save it to
+        the cache. Returns the hash object fed with the asset.
+        """
+        assert self._target is not None
+        logger.debug("Saving asset to '%s'", tmp_file)
+        target, partial = tmp_file, None
+        if self._cache is not None:
+            partial = self._cache.partial_path(
+                self._repository, self._target.tag, self.asset
+            )
+            # Download next to the cache, so caching the asset is a rename.
+            target = partial.with_name(f"{partial.name}.done")
+        # pylint: disable=import-outside-toplevel
+        from .download import Download
+
+        urls = self._asset_urls(self.asset)
+        for index, url in enumerate(urls):
+            # A failed attempt may have fed the hash object, which can't be rewound.
+            mixer = _new_mixer(algorithm)
+            result = Download(
+                self.session,
+                url,
+                target,
+                mixer,
+                connections=self._connections,
+                partial=partial,
+            )
+            try:
+                result.run()
+                break
+            except OSError as exception:
+                if index == len(urls) - 1:
+                    raise
+                logger.warning(
+                    "Download from '%s' failed, falling back to '%s': %s",
+                    url,
+                    urls[index + 1],
+                    exception,
+                )
+            finally:
+                self.metrics.downloaded_bytes += result.downloaded
+                self.metrics.download_resumes += result.resumes
+
+        if self._cache is None:
+            return mixer
+        # Only cache verified assets, the other processes waiting on the download
+        # would reuse a corrupted asset.
+        local = mixer.hexdigest() if mixer is not None else None
+        if (
+            self.checksum is not None
+            and not self._remote_extract
+            and not self._verify_checksum(target, local)
+        ):
+            move(target, tmp_file)
+            return mixer
+
+        # Stage the asset first, another install sharing the cache may evict it.
+        clone_file(target, tmp_file)
+        digest = local if self.checksum_algorithm == CACHE_ALGORITHM else None
+        self._cache.put(
+            self._repository,
+            self._target.tag,
+            self.asset,
+            target,
+            move=True,
+            digest=digest,
+        )
+        return mixer
+
+    def _download_release_asset(
+        self,
+        tmp_dir: Path,
+        algorithm: str | None = None,
+    ) -> tuple[Path, Any]:
         """
         Download target version release file in a temporary file.
+
+        Also returns the hash object fed with each downloaded chunk, if any.
+        """
+        assert self._target is not None
+        tmp_file = tmp_dir / self.asset
+
+        if self._cache is None:
+            return tmp_file, self._fetch_release_asset(tmp_file, algorithm)
+
+        mixer = _new_mixer(algorithm)
+        if self._copy_cached_asset(tmp_file, mixer):
+            return tmp_file, mixer
+
+        # Processes sharing the cache download the asset once, the others wait for
+        # the download and use the cached asset.
+        with self._cache.lock(self._repository, self._target.tag, self.asset):
+            if not self._copy_cached_asset(tmp_file, mixer):
+                mixer = self._fetch_release_asset(tmp_file, algorithm)
+
+        return tmp_file, mixer
+
+    def _fetch_release_member(
+        self,
+        tmp_dir: Path,
+        algorithm: str | None = None,
+    ) -> tuple[Path, Any]:
+        """
+        Fetch the file to extract out of the remote zip asset, from the first download
+        url serving it. Also returns the hash object fed with the extracted file.
+        """
+        # pylint: disable=import-outside-toplevel
+        from .remotezip import RemoteFile, fetch_zip_member
+
+        assert self.extract is not None
+        urls = self._asset_urls(self.asset)
+        for index, url in enumerate(urls):
+            # A failed attempt may have fed the hash object, which can't be rewound.
+            mixer = _new_mixer(algorithm)
+            remote = None
+            try:
+                remote = RemoteFile(self.session, url)
+                return fetch_zip_member(remote, self.extract, tmp_dir, mixer), mixer
+            except OSError as exception:
+                if index == len(urls) - 1:
+                    raise
+                logger.warning(
+                    "Download from '%s' failed, falling back to '%s': %s",
+                    url,
+                    urls[index + 1],
+                    exception,
+                )
+            finally:
+                if remote is not None:
+                    self.metrics.downloaded_bytes += remote.downloaded
+                    self.metrics.download_resumes += remote.resumes
+                    remote.close()
+
+        raise ValueError("no download url given")
+
+    def _download_release_member(
+        self,
+        tmp_dir: Path,
+        algorithm: str | None = None,
+    ) -> tuple[Path, Any]:
         """
-        url = self._github_asset_url(self.asset)
-        with self._session.get(url, stream=True) as res:
-            res.raise_for_status()
-            tmp_file = tmp_dir / self.asset
+        Get the file to extract out of the remote zip asset using range requests.
+        Falls back to the downloaded or cached asset when the server does not support
+        range requests.
 
-            logger.debug("Saving asset to '%s'", tmp_file)
-            with tmp_file.open("wb") as tmp_fd:
-                for chunk in res.iter_content(chunk_size=2048):
-                    tmp_fd.write(chunk)
+        Also returns the hash object fed with the extracted file, if any.
+        """
+        # pylint: disable=import-outside-toplevel
+        from .download import RangeNotSupported
 
-        return tmp_file
+        assert self._target is not None
+        cached = None
+        if self._cache is not None:
+            cached = self._cache.get(self._repository, self._target.tag, self.asset)
+
+        if cached is None:
+            try:
+                return self._fetch_release_member(tmp_dir, algorithm)
+            except RangeNotSupported as exception:
+                logger.info("Downloading the whole asset: %s", exception)
+
+        asset_file, _ = self._download_release_asset(tmp_dir)
+        extracted = self._extract_release_asset(tmp_dir, asset_file)
+        mixer = _new_mixer(algorithm)
+        if mixer is not None and extracted.is_file():
+            update_file_checksum(mixer, extracted)
+        return extracted, mixer
 
     def _extract_release_asset(self, tmp_dir: Path, asset_file: Path) -> Path:
         """
-        Extract downloaded release archive.
+        Extract downloaded release archive. Only the requested file is extracted from
+        tar and zip archives, other formats are fully unpacked.
         """
-        unpack_archive(asset_file, tmp_dir)
+        # pylint: disable=import-outside-toplevel
+        from .unpack import (
+            can_extract_member,
+            extract_member,
+            register_unpack_formats,
+        )
+
         assert self.extract is not None
+        if can_extract_member(asset_file):
+            return extract_member(asset_file, self.extract, tmp_dir)
+
+        register_unpack_formats()
+        unpack_archive(asset_file, tmp_dir)
         return tmp_dir / self.extract
 
-    def run(self):
+    def _install_file(self, asset_file: Path):
+        """
+        Set the asset file permissions, and atomically rename it to its destination.
+        The asset file is staged next to the destination, so readers never see a
+        missing or partially written destination file.
+        """
+        self._set_permissions(asset_file)
+        os.replace(asset_file, self.destination)
+
+        logger.info("Installed file to '%s'", self.destination)
+
+    def _set_permissions(self, path: Path):
+        if self._mode is not None:
+            path.chmod(int(self._mode, 8))
+        else:
+            path.chmod(0o755)
+
+        if self._owner is not None:
+            chown(path, self._owner, self._group or self._owner)
+
+    def is_installed(self) -> bool:
+        """
+        Resolve the target and local versions, and check whether the target version
+        is already installed.
+        """
         self._get_target_version()
         self._get_local_version()
+        assert self._target is not None
 
         if self._local is not None:
             if not self.destination.is_file():
@@ -223,46 +813,178 @@ class GhReleaseInstall:
                     self.destination,
                 )
             elif self._target.version == self._local.version:
-                logger.info("Target version is already installed")
-                sys.exit(0)
-
-        with TemporaryDirectory(prefix="gh-release-installer") as tmp_dir:
-            tmp_dir = Path(tmp_dir)
-            asset_file = self._download_release_asset(tmp_dir)
+                return True
 
-            if self.checksum is not None:
-                if not self._verify_checksum(asset_file):
-                    logger.error("Checksum verification failed")
-                    sys.exit(1)
-                logger.info("Checksum verification succeeded")
-
-            if self.extract is not None:
-                asset_file = self._extract_release_asset(tmp_dir, asset_file)
-                logger.info("Extracted archive to '%s'", asset_file)
+        return False
 
-                if not asset_file.exists():
-                    logger.error(
-                        "Asset '%s' not found in archive",
-                        asset_file.relative_to(tmp_dir),
-                    )
-                    sys.exit(1)
+    def installed_checksum(self, record: dict | None = None) -> tuple[str, str] | None:
+        """
+        Get the algorithm and the expected digest of the destination file, from the
+        checksum of the installed version. The installed version is read from the
+        version file, or from the recorded install. Returns None when the installed
+        version is unknown, or when the checksum does not apply to the destination
+        file, e.g. when the file is extracted from the asset.
+        """
+        self._get_local_version()
+        if self._local is not None:
+            self._target = self._local
+        elif record is not None:
+            self._target = Release(record["tag"])
+        elif self._version != LATEST:
+            self._target = Release(self._version)
+        else:
+            # The latest release may be newer than the installed one.
+            return None
 
-            if self.destination.is_file():
-                self.destination.unlink()
+        if self.checksum_algorithm is None:
+            return None
+        if self.extract is not None and not self._remote_extract:
+            return None
 
-            move(asset_file, self.destination)
+        self._prefetch_checksum()
+        expected = self._expected_checksum()
+        if expected is None:
+            return None
+        return self.checksum_algorithm, expected
 
-            if self._mode is not None:
-                self.destination.chmod(int(self._mode, 8))
-            else:
-                self.destination.chmod(0o755)
+    def _rate_limit(self) -> dict | None:
+        """
+        Rate limit budget of the session, if it was created.
+        """
+        if self._session is None:
+            return None
+        adapter = self._session.get_adapter(f"{self._api_urls[0]}/")
+        rate_limit = getattr(adapter, "rate_limit", None)
+        return rate_limit.snapshot() if rate_limit is not None else None
 
-            if self._owner is not None:
-                chown(self.destination, self._owner, self._group or self._owner)
+    def run(self):
+        self.metrics = Metrics(self._repository, self._asset, self._destination)
+        rate_limit = self._rate_limit()
+        rate_limited = rate_limit["rate_limited"] if rate_limit is not None else 0
+
+        start = perf_counter()
+        try:
+            self._run()
+        except BaseException:
+            self.metrics.status = "failed"
+            raise
+        finally:
+            self.metrics.duration = perf_counter() - start
+            self.metrics.tag = self.target_version
+            rate_limit = self._rate_limit()
+            if rate_limit is not None:
+                self.metrics.rate_limited = rate_limit["rate_limited"] - rate_limited
+                self.metrics.rate_limit_remaining = rate_limit["remaining"]
+
+            if self._metrics_callback is not None:
+                self._metrics_callback(self.metrics)
+
+    def _run(self):
+        with self.metrics.phase("resolve"):
+            installed = self.is_installed()
+        if installed:
+            logger.info("Target version is already installed")
+            self.metrics.status = "up_to_date"
+            return
+        assert self._target is not None
 
-            logger.info("Installed file to '%s'", self.destination)
+        with self.metrics.phase("resolve"):
+            self._check_release_assets()
+        self._prefetch_checksum()
+        with self.metrics.phase("verify"):
+            verified = self._is_destination_verified()
+        if verified:
+            logger.info("Installed file already matches the expected checksum")
+            with self.metrics.phase("install"):
+                self._set_permissions(self.destination)
+            self.metrics.status = "verified"
+        else:
+            self._download_and_install()
+            self.metrics.status = "installed"
 
         # Save to local tag/version file
         if self.version_file is not None:
             self.version_file.write_text(self._target.tag, encoding="utf-8")
             logger.info("Saved version file to '%s'", self.version_file)
+
+        if self._cache is not None:
+            self._record_install()
+
+    def _record_install(self):
+        """
+        Record the installed file and its digest in the cache, to audit it later.
+        """
+        assert self._cache is not None
+        assert self._target is not None
+
+        algorithm = self.checksum_algorithm or CACHE_ALGORITHM
+        self._cache.put_install(
+            self.destination,
+            {
+                "repository": self._repository,
+                "asset": self.asset,
+                "tag": self._target.tag,
+                "algorithm": algorithm,
+                "digest": self._cache.file_checksum(algorithm, self.destination),
+                "installed_at": time(),
+            },
+        )
+
+    def _check_extracted(self, tmp_dir: Path, extracted: Path):
+        logger.info("Extracted archive to '%s'", extracted)
+        if not extracted.exists():
+            logger.error(
+                "Asset '%s' not found in archive",
+                extracted.relative_to(tmp_dir),
+            )
+            sys.exit(1)
+
+    def _download_and_install(self):
+        # Stage the files on the destination filesystem, so installing is a rename.
+        with TemporaryDirectory(
+            prefix=".gh-release-installer-",
+            dir=self.destination.parent,
+        ) as tmp_dir:
+            tmp_dir = Path(tmp_dir)
+            algorithm = self.checksum_algorithm
+
+            if self._remote_extract:
+                with self.metrics.phase("download"):
+                    asset_file, mixer = self._download_release_member(
+                        tmp_dir, algorithm
+                    )
+                self._check_extracted(tmp_dir, asset_file)
+            else:
+                with self.metrics.phase("download"):
+                    asset_file, mixer = self._download_release_asset(tmp_dir, algorithm)
+
+            if self.checksum is not None:
+                assert mixer is not None
+                with self.metrics.phase("verify"):
+                    verified = self._verify_checksum(asset_file, mixer.hexdigest())
+                if not verified:
+                    logger.error("Checksum verification failed")
+                    if self._cache is not None:
+                        self._cache.remove(
+                            self._repository, self._target.tag, self.asset
+                        )
+                    sys.exit(1)
+                logger.info("Checksum verification succeeded")
+
+            if self.extract is not None and not self._remote_extract:
+                with self.metrics.phase("extract"):
+                    asset_file = self._extract_release_asset(tmp_dir, asset_file)
+                self._check_extracted(tmp_dir, asset_file)
+
+            with self.metrics.phase("install"):
+                self._install_file(asset_file)
+
+        # Record the installed file checksum, to not hash it on the next run
+        if (
+            self._cache is not None
+            and mixer is not None
+            and (self.extract is None or self._remote_extract)
+        ):
+            self._cache.put_file_checksum(
+                self.checksum_algorithm, self.destination, mixer.hexdigest()
+            )
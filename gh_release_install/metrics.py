@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter, time
+from typing import Iterator
+
+from .cache import write_file_atomic
+
+__all__ = [
+    "Metrics",
+    "format_prometheus",
+    "write_metrics_json",
+    "write_prometheus_textfile",
+]
+
+PHASES = ("resolve", "download", "verify", "extract", "install")
+
+PROMETHEUS_PREFIX = "gh_release_install"
+
+
+# pylint: disable=too-many-instance-attributes
+class Metrics:
+    """
+    Timings and counters of a single installer run.
+    """
+
+    def __init__(
+        self,
+        repository: str,
+        asset: str,
+        destination: str | None = None,
+    ) -> None:
+        self.repository = repository
+        self.asset = asset
+        self.destination = destination
+        self.tag: str | None = None
+        self.status: str | None = None
+        self.timestamp = time()
+        self.duration = 0.0
+        self.phases: dict[str, float] = {}
+        self.downloaded_bytes = 0
+        self.download_resumes = 0
+        self.rate_limited = 0
+        self.rate_limit_remaining: int | None = None
+        self.cache_hit = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time a phase of the run, the time spent in the same phase adds up.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + perf_counter() - start
+
+    @property
+    def throughput(self) -> float | None:
+        """
+        Download throughput in bytes per second.
+        """
+        duration = self.phases.get("download")
+        if not self.downloaded_bytes or not duration:
+            return None
+        return self.downloaded_bytes / duration
+
+    def to_dict(self) -> dict:
+        return {
+            "repository": self.repository,
+            "asset": self.asset,
+            "destination": self.destination,
+            "tag": self.tag,
+            "status": self.status,
+            "timestamp": self.timestamp,
+            "duration": self.duration,
+            "phases": self.phases,
+            "downloaded_bytes": self.downloaded_bytes,
+            "throughput": self.throughput,
+            "download_resumes": self.download_resumes,
+            "rate_limited": self.rate_limited,
+            "rate_limit_remaining": self.rate_limit_remaining,
+            "cache_hit": self.cache_hit,
+        }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(metrics: Metrics, **extra: str) -> str:
+    # The same asset may be installed to many destinations.
+    labels = {"repository": metrics.repository, "asset": metrics.asset}
+    if metrics.destination is not None:
+        labels["destination"] = metrics.destination
+    labels.update(extra)
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def format_prometheus(runs: list[Metrics]) -> str:
+    """
+    Format the metrics of many runs using the Prometheus text exposition format.
+    """
+    families: list[tuple[str, str, list[tuple[str, float]]]] = [
+        (
+            "success",
+            "Whether the last install succeeded.",
+            [(_labels(m), float(m.status != "failed")) for m in runs],
+        ),
+        (
+            "last_run_timestamp_seconds",
+            "Time of the last install.",
+            [(_labels(m), m.timestamp) for m in runs],
+        ),
+        (
+            "duration_seconds",
+            "Duration of the last install.",
+            [(_labels(m), m.duration) for m in runs],
+        ),
+        (
+            "phase_duration_seconds",
+            "Duration of each phase of the last install.",
+            [
+                (_labels(m, phase=phase), m.phases[phase])
+                for m in runs
+                for phase in PHASES
+                if phase in m.phases
+            ],
+        ),
+        (
+            "downloaded_bytes",
+            "Bytes downloaded by the last install.",
+            [(_labels(m), m.downloaded_bytes) for m in runs],
+        ),
+        (
+            "download_resumes",
+            "Interrupted downloads resumed by the last install.",
+            [(_labels(m), m.download_resumes) for m in runs],
+        ),
+        (
+            "rate_limited",
+            "Rate limited requests retried during the last install.",
+            [(_labels(m), m.rate_limited) for m in runs],
+        ),
+        (
+            "cache_hit",
+            "Whether the last install used a cached asset.",
+            [(_labels(m), float(m.cache_hit)) for m in runs],
+        ),
+    ]
+
+    lines = []
+    for name, description, samples in families:
+        if not samples:
+            continue
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {description}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} gauge")
+        for labels, value in samples:
+            lines.append(f"{PROMETHEUS_PREFIX}_{name}{{{labels}}} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_json(path: Path, runs: list[Metrics]):
+    write_file_atomic(path, json.dumps([m.to_dict() for m in runs], indent=2))
+
+
+def write_prometheus_textfile(path: Path, runs: list[Metrics]):
+    """
+    Write the metrics for the node exporter textfile collector. The file is
+    renamed in place, so the collector never reads a partially written file.
+    """
+    write_file_atomic(path, format_prometheus(runs))
+    path.chmod(0o644)
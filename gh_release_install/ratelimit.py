@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import logging
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from time import sleep, time
+
+from requests import Response
+from requests.adapters import HTTPAdapter
+
+__all__ = [
+    "RateLimit",
+    "RateLimitAdapter",
+]
+
+logger = logging.getLogger(__name__)
+
+# Start pacing the requests when the remaining budget goes below this ratio.
+PACING_RATIO = 0.1
+# Longest delay we are willing to wait for, before or after a request.
+MAX_WAIT = 15 * 60
+# Number of times a rate limited request is retried.
+RATE_LIMITED_RETRIES = 3
+
+
+def _retry_after(value: str) -> float | None:
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimit:
+    """
+    Track the Github API rate limit budget from the responses headers, and compute
+    the delays required to not exhaust it.
+    """
+
+    def __init__(self) -> None:
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset: float | None = None
+        self.rate_limited = 0
+        self._lock = Lock()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "reset": self.reset,
+                "rate_limited": self.rate_limited,
+            }
+
+    def update(self, res: Response):
+        """
+        Update the budget from the response headers.
+        """
+        headers = res.headers
+        if "X-RateLimit-Remaining" not in headers:
+            return
+
+        with self._lock:
+            try:
+                self.remaining = int(headers["X-RateLimit-Remaining"])
+                self.limit = int(headers.get("X-RateLimit-Limit", self.limit or 0))
+                self.reset = float(headers.get("X-RateLimit-Reset", self.reset or 0))
+            except ValueError:
+                return
+
+        logger.debug(
+            "Rate limit budget: %s/%s remaining, reset in %.0fs",
+            self.remaining,
+            self.limit,
+            max((self.reset or 0) - time(), 0),
+        )
+
+    def delay(self) -> float:
+        """
+        Delay to wait before the next request. Once the remaining budget is low, the
+        requests are spread until the budget reset.
+        """
+        with self._lock:
+            if not self.limit or self.remaining is None or self.reset is None:
+                return 0
+            if self.remaining > self.limit * PACING_RATIO:
+                return 0
+
+            until_reset = max(self.reset - time(), 0)
+            if self.remaining > 0:
+                until_reset /= self.remaining + 1
+            # Pay for the next request now
+            self.remaining = max(self.remaining - 1, 0)
+
+        return min(until_reset, MAX_WAIT)
+
+    def retry_delay(self, res: Response) -> float | None:
+        """
+        Delay to wait before retrying a rate limited request, or None if the request
+        was not rate limited.
+        """
+        if res.status_code not in (403, 429):
+            return None
+
+        if "Retry-After" in res.headers:
+            delay = _retry_after(res.headers["Retry-After"])
+        elif res.headers.get("X-RateLimit-Remaining") == "0":
+            delay = max((self.reset or 0) - time(), 0) + 1
+        else:
+            return None
+
+        if delay is None:
+            return None
+        with self._lock:
+            self.rate_limited += 1
+        return delay
+
+
+class RateLimitAdapter(HTTPAdapter):
+    """
+    Transport adapter pacing the requests to not exhaust the rate limit budget,
+    and retrying rate limited requests after the delay asked by the server.
+    """
+
+    def __init__(self, rate_limit: RateLimit | None = None, **kwargs) -> None:
+        self.rate_limit = rate_limit if rate_limit is not None else RateLimit()
+        super().__init__(**kwargs)
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        delay = self.rate_limit.delay()
+        if delay > 0:
+            logger.info(
+                "Pacing requests to preserve the rate limit, waiting %.1fs", delay
+            )
+            sleep(delay)
+
+        attempt = 0
+        while True:
+            res = super().send(request, stream, timeout, verify, cert, proxies)
+            self.rate_limit.update(res)
+
+            retry_delay = self.rate_limit.retry_delay(res)
+            if retry_delay is None or attempt >= RATE_LIMITED_RETRIES:
+                return res
+            if retry_delay > MAX_WAIT:
+                logger.error("Rate limited for %.0fs, giving up", retry_delay)
+                return res
+
+            logger.warning("Rate limited, retrying in %.0fs", retry_delay)
+            res.close()
+            sleep(retry_delay)
+            attempt += 1
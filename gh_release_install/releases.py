@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from time import time
+from typing import TYPE_CHECKING, Sequence
+
+from .auth import GITHUB_ENTERPRISE_API_PATH
+from .cache import Cache
+from .main import GITHUB_API_URL, base_urls, get_latest_tag, with_fallbacks
+
+if TYPE_CHECKING:
+    from requests import Session
+
+__all__ = [
+    "fetch_release_assets",
+    "get_latest_tags",
+    "graphql_url",
+    "known_release_assets",
+    "parse_release_assets",
+    "remember_release_assets",
+]
+
+logger = logging.getLogger(__name__)
+
+# Number of repositories resolved per GraphQL query.
+GRAPHQL_BATCH_SIZE = 50
+
+# Assets indexes of the releases, per repository and tag, filled for free when
+# resolving the latest release, so installing many assets from the same release
+# fetches the index once.
+RELEASE_ASSETS_CACHE_SIZE = 128
+_release_assets: dict[tuple[str, str], dict[str, dict]] = {}
+_release_assets_lock = Lock()
+
+
+def parse_release_assets(release: dict) -> dict[str, dict]:
+    """
+    Index the assets of a Github release API response by name.
+    """
+    return {
+        asset["name"]: {
+            "name": asset["name"],
+            "size": asset.get("size"),
+            "content_type": asset.get("content_type"),
+        }
+        for asset in release.get("assets") or []
+    }
+
+
+def remember_release_assets(
+    repository: str,
+    tag: str,
+    assets: dict[str, dict],
+    cache: Cache | None = None,
+):
+    with _release_assets_lock:
+        _release_assets[(repository, tag)] = assets
+        if len(_release_assets) > RELEASE_ASSETS_CACHE_SIZE:
+            del _release_assets[next(iter(_release_assets))]
+
+    if cache is not None:
+        cache.put_release_assets(repository, tag, assets)
+
+
+def known_release_assets(
+    repository: str,
+    tag: str,
+    cache: Cache | None = None,
+) -> dict[str, dict] | None:
+    """
+    Get the assets index of a release from memory or the cache, without any request.
+    """
+    with _release_assets_lock:
+        assets = _release_assets.get((repository, tag))
+    if assets is None and cache is not None:
+        assets = cache.get_release_assets(repository, tag)
+    return assets
+
+
+def fetch_release_assets(
+    session: Session,
+    repository: str,
+    tag: str,
+    cache: Cache | None = None,
+    api_urls: Sequence[str] | None = None,
+) -> dict[str, dict]:
+    """
+    Fetch the assets of a release indexed by name, with their size and content type,
+    from the first of the api urls answering. The index is kept in memory and in the
+    cache.
+    """
+
+    def fetch(api_url: str) -> dict[str, dict]:
+        with session.get(f"{api_url}/repos/{repository}/releases/tags/{tag}") as res:
+            res.raise_for_status()
+            return parse_release_assets(res.json())
+
+    assets = with_fallbacks(base_urls(api_urls, GITHUB_API_URL), fetch)
+    remember_release_assets(repository, tag, assets, cache)
+    return assets
+
+
+def _graphql_query(repositories: list[str]) -> tuple[str, dict[str, str]]:
+    params = []
+    fields = []
+    variables = {}
+    for index, repository in enumerate(repositories):
+        owner, name = repository.split("/", 1)
+        params.append(f"$o{index}: String!, $n{index}: String!")
+        fields.append(
+            f"r{index}: repository(owner: $o{index}, name: $n{index}) "
+            "{ latestRelease { tagName } }"
+        )
+        variables[f"o{index}"] = owner
+        variables[f"n{index}"] = name
+
+    query = f"query({', '.join(params)}) {{ {' '.join(fields)} }}"
+    return query, variables
+
+
+def graphql_url(api_url: str) -> str:
+    """
+    GraphQL endpoint of an api url. Github Enterprise serves the REST API under
+    `/api/v3` and the GraphQL API under `/api/graphql`.
+    """
+    if api_url.endswith(GITHUB_ENTERPRISE_API_PATH):
+        return f"{api_url.removesuffix(GITHUB_ENTERPRISE_API_PATH)}/api/graphql"
+    return f"{api_url}/graphql"
+
+
+def _post_graphql(
+    session: Session,
+    query: str,
+    variables: dict[str, str],
+    api_url: str,
+) -> dict:
+    with session.post(
+        graphql_url(api_url),
+        json={"query": query, "variables": variables},
+    ) as res:
+        res.raise_for_status()
+        return res.json()
+
+
+def _cached_latest_tags(
+    repositories: list[str],
+    cache: Cache,
+    ttl: float,
+) -> dict[str, str]:
+    """
+    Latest tags of the repositories checked within the ttl, from the cache.
+    """
+    tags = {}
+    for repository in repositories:
+        latest = cache.get_latest(repository)
+        if latest is not None and time() - latest["checked_at"] < ttl:
+            logger.debug("Using cached latest tag for '%s'", repository)
+            tags[repository] = latest["tag"]
+    return tags
+
+
+def _put_latest_tag(cache: Cache, repository: str, tag: str):
+    """
+    Store a latest tag resolved without HTTP validators, the validators of the
+    cached tag are kept while the tag does not change.
+    """
+    latest = cache.get_latest(repository) or {}
+    if latest.get("tag") != tag:
+        latest = {"etag": None, "last_modified": None}
+    cache.put_latest(repository, {**latest, "tag": tag, "checked_at": time()})
+
+
+def _get_latest_tags_graphql(
+    session: Session,
+    repositories: list[str],
+    api_urls: Sequence[str],
+    cache: Cache | None = None,
+) -> dict[str, str]:
+    tags = {}
+    for start in range(0, len(repositories), GRAPHQL_BATCH_SIZE):
+        chunk = repositories[start : start + GRAPHQL_BATCH_SIZE]
+        query, variables = _graphql_query(chunk)
+
+        body = with_fallbacks(
+            api_urls, partial(_post_graphql, session, query, variables)
+        )
+
+        for error in body.get("errors") or []:
+            logger.debug("GraphQL error: %s", error.get("message"))
+
+        data = body.get("data") or {}
+        for index, repository in enumerate(chunk):
+            release = (data.get(f"r{index}") or {}).get("latestRelease")
+            if release is not None:
+                tags[repository] = release["tagName"]
+                if cache is not None:
+                    _put_latest_tag(cache, repository, release["tagName"])
+
+    return tags
+
+
+def _get_latest_tags_rest(
+    session: Session,
+    repositories: list[str],
+    api_urls: Sequence[str],
+    cache: Cache | None = None,
+    ttl: float | None = None,
+) -> dict[str, str]:
+    # pylint: disable=broad-except
+    def resolve(repository: str) -> str | None:
+        try:
+            return get_latest_tag(session, repository, cache, ttl, api_urls)
+        except Exception as exception:
+            logger.debug("Failed to resolve '%s': %s", repository, exception)
+            return None
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        resolved = executor.map(resolve, repositories)
+
+    return {
+        repository: tag
+        for repository, tag in zip(repositories, resolved)
+        if tag is not None
+    }
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+def get_latest_tags(
+    session: Session,
+    repositories: list[str],
+    cache: Cache | None = None,
+    ttl: float | None = None,
+    api_urls: Sequence[str] | None = None,
+) -> dict[str, str]:
+    """
+    Get the latest release tag of many repositories, from the first of the api urls
+    answering.
+
+    When the session is authenticated, the tags are fetched using batched GraphQL
+    queries, otherwise using one REST request per repository. Within the ttl, the
+    cached tags are used without any request. Repositories that could not be
+    resolved are missing from the result.
+    """
+    repositories = sorted(set(repositories))
+    tags = {}
+    if cache is not None and ttl is not None:
+        tags = _cached_latest_tags(repositories, cache, ttl)
+        repositories = [
+            repository for repository in repositories if repository not in tags
+        ]
+    if not repositories:
+        return tags
+    api_urls = base_urls(api_urls, GITHUB_API_URL)
+
+    if "Authorization" in session.headers or session.auth is not None:
+        try:
+            tags.update(
+                _get_latest_tags_graphql(session, repositories, api_urls, cache)
+            )
+            return tags
+        # pylint: disable=broad-except
+        except Exception as exception:
+            logger.warning("Falling back to the REST API: %s", exception)
+
+    tags.update(_get_latest_tags_rest(session, repositories, api_urls, cache, ttl))
+    return tags
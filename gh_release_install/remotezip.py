@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import io
+import logging
+import zipfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+from .download import (
+    RESUME_ATTEMPTS,
+    RangeNotSupported,
+    parse_content_range,
+    range_headers,
+    resumable_errors,
+)
+from .unpack import find_zip_member, member_name, member_path, save_member
+
+if TYPE_CHECKING:
+    from requests import Response, Session
+
+__all__ = [
+    "RemoteFile",
+    "fetch_zip_member",
+]
+
+logger = logging.getLogger(__name__)
+
+# The end of central directory record is 22 bytes, followed by a comment of up to
+# 64 KiB, and preceded by the zip64 locator and record.
+TAIL_SIZE = 128 * 1024
+READ_SIZE = 64 * 1024
+
+
+# pylint: disable=too-many-instance-attributes
+class RemoteFile(io.RawIOBase):
+    """
+    Read only file reading a remote file using HTTP range requests.
+
+    The tail of the file is fetched upfront, the other reads stream a range of the
+    file, which is kept open as long as the reads are sequential.
+    """
+
+    def __init__(self, session: Session, url: str, tail_size: int = TAIL_SIZE):
+        super().__init__()
+        self.session = session
+        self.url = url
+
+        # Transfer statistics, across all the requests.
+        self.downloaded = 0
+        self.resumes = 0
+        self._resumable_errors = resumable_errors()
+
+        self._pos = 0
+        self._stream: Response | None = None
+        self._chunks: Iterator[bytes] | None = None
+        self._pending = memoryview(b"")
+        self._stream_pos = 0
+        self._stream_end: int | None = None
+
+        # Stream the response, a server ignoring the range would otherwise send the
+        # whole archive into memory before the status is checked.
+        with self.session.get(
+            url, headers={"Range": f"bytes=-{tail_size}"}, stream=True
+        ) as res:
+            res.raise_for_status()
+            content_range = parse_content_range(res)
+            if (
+                res.status_code != 206
+                or content_range is None
+                or "Content-Encoding" in res.headers
+            ):
+                raise RangeNotSupported(f"range request returned {res.status_code}")
+
+            # The following requests skip the redirects.
+            self.resolved_url = res.url
+            self.tail = res.content
+            self.tail_offset, _, self.size = content_range
+            self.downloaded += len(self.tail)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self._pos = offset
+        return self._pos
+
+    def stream_until(self, end: int):
+        """
+        Bound the next streamed range, e.g. to the end of a zip member, so the
+        server does not send more than what will be read.
+        """
+        self._stream_end = end
+
+    def _close_stream(self):
+        if self._stream is not None:
+            self._stream.close()
+        self._stream, self._chunks = None, None
+        self._pending = memoryview(b"")
+
+    def _open_stream(self):
+        self._close_stream()
+
+        end = self.tail_offset
+        if self._stream_end is not None and self._pos < self._stream_end:
+            end = min(end, self._stream_end)
+
+        headers = range_headers(self.url, self.resolved_url, self._pos, end - 1)
+        res = self.session.get(self.resolved_url, headers=headers, stream=True)
+        try:
+            res.raise_for_status()
+            if res.status_code != 206:
+                raise RangeNotSupported(f"range request returned {res.status_code}")
+        except Exception:
+            res.close()
+            raise
+
+        self._stream = res
+        self._chunks = res.iter_content(chunk_size=READ_SIZE)
+        self._stream_pos = self._pos
+
+    def _next_chunk(self) -> memoryview:
+        for attempt in range(RESUME_ATTEMPTS + 1):
+            if self._chunks is None or self._stream_pos != self._pos:
+                self._open_stream()
+            assert self._chunks is not None
+            try:
+                chunk = next(self._chunks, b"")
+            except self._resumable_errors as exception:
+                if attempt == RESUME_ATTEMPTS:
+                    raise
+                logger.warning(
+                    "Range read interrupted at %d, resuming: %s", self._pos, exception
+                )
+                self.resumes += 1
+                self._close_stream()
+                continue
+
+            if not chunk:
+                # The range ended, the next read continues with a new range.
+                self._close_stream()
+                continue
+            self.downloaded += len(chunk)
+            return memoryview(chunk)
+
+        raise OSError(f"unable to read {self.url} at {self._pos}")
+
+    def readinto(self, buffer) -> int:
+        buffer = memoryview(buffer).cast("B")
+        if self._pos >= self.size:
+            return 0
+
+        if self._pos >= self.tail_offset:
+            start = self._pos - self.tail_offset
+            data = memoryview(self.tail)[start : start + len(buffer)]
+        else:
+            if not self._pending or self._stream_pos != self._pos:
+                self._pending = self._next_chunk()
+            size = min(len(buffer), self.tail_offset - self._pos)
+            data, self._pending = self._pending[:size], self._pending[size:]
+            self._stream_pos += len(data)
+
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        self._close_stream()
+        super().close()
+
+
+def fetch_zip_member(
+    remote: RemoteFile,
+    member: str,
+    extract_dir: str | Path,
+    mixer=None,
+) -> Path:
+    """
+    Extract a single member of a remote zip archive, reading the central directory
+    and the member using range requests, without downloading the rest of the
+    archive. The returned path does not exist if the member was not found.
+
+    When a hash object is given, it is fed with the extracted member content.
+    """
+    extract_dir = Path(extract_dir)
+
+    member = member_name(member)
+    extracted = member_path(extract_dir, member)
+
+    logger.debug("Fetching member '%s' from '%s'", member, remote.url)
+    with io.BufferedReader(remote, READ_SIZE) as fileobj:
+        with zipfile.ZipFile(fileobj) as archive:
+            info = find_zip_member(archive, member)
+            if info is None:
+                return extracted
+
+            # The member ends where the next member or the central directory starts.
+            remote.stream_until(
+                min(
+                    [archive.start_dir]
+                    + [
+                        other.header_offset
+                        for other in archive.infolist()
+                        if other.header_offset > info.header_offset
+                    ]
+                )
+            )
+            with archive.open(info) as source:
+                save_member(source, extracted, mixer)
+
+    return extracted
@@ -3,32 +3,203 @@ from __future__ import annotations
 import bz2
 import gzip
 import logging
+import lzma
+import tarfile
+import zipfile
+from contextlib import contextmanager
 from pathlib import Path
-from shutil import get_unpack_formats, register_unpack_format
+from shutil import copyfileobj, get_unpack_formats, register_unpack_format
+from tempfile import TemporaryFile
+from typing import IO, Iterator
+
+try:
+    from compression import zstd  # type: ignore[import-not-found]
+except ImportError:  # Python < 3.14
+    try:
+        import zstandard as zstd  # type: ignore[import-not-found,no-redef]
+    except ImportError:
+        zstd = None
 
 logger = logging.getLogger(__name__)
 
+ZSTD_TAR_EXTENSIONS = (".tar.zst", ".tzst")
+TAR_EXTENSIONS = (
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+    *ZSTD_TAR_EXTENSIONS,
+)
+ZIP_EXTENSIONS = (".zip",)
 
-def _unpack_bz2(filename, extract_dir):
+COPY_BUFSIZE = 1024 * 1024
+
+
+def _zstd_open(filename: Path, mode: str = "rb") -> IO[bytes]:
+    if zstd is None:
+        raise ValueError(
+            "zstd files require Python 3.14 or later, or the zstandard package"
+        )
+    return zstd.open(filename, mode)
+
+
+def _unpack_single(opener, filename, extract_dir):
     filename = Path(filename)
     extract_dir = Path(extract_dir)
 
     extracted = extract_dir / filename.stem
 
-    with filename.open("rb") as filename_fd:
+    with opener(filename, "rb") as filename_fd:
         with extracted.open("wb") as extracted_fd:
-            extracted_fd.write(bz2.decompress(filename_fd.read()))
+            copyfileobj(filename_fd, extracted_fd, COPY_BUFSIZE)
+
+
+def _unpack_bz2(filename, extract_dir):
+    _unpack_single(bz2.open, filename, extract_dir)
 
 
 def _unpack_gzip(filename, extract_dir):
+    _unpack_single(gzip.open, filename, extract_dir)
+
+
+def _unpack_xz(filename, extract_dir):
+    _unpack_single(lzma.open, filename, extract_dir)
+
+
+def _unpack_zstd(filename, extract_dir):
+    _unpack_single(_zstd_open, filename, extract_dir)
+
+
+def member_name(name: str) -> str:
+    """
+    Normalize an archive member name, without the leading './' or '/'.
+    """
+    while name.startswith("./"):
+        name = name[2:]
+    return name.lstrip("/")
+
+
+def member_path(extract_dir: Path, member: str) -> Path:
+    """
+    Path of an extracted member, which must be inside the extract directory.
+    """
+    extracted = extract_dir / member_name(member)
+    if not extracted.resolve().is_relative_to(extract_dir.resolve()):
+        raise ValueError(f"member {member} is outside of the extract directory")
+    return extracted
+
+
+def save_member(source, extracted: Path, mixer=None):
+    """
+    Save an archive member file object, feeding the hash object when given.
+    """
+    extracted.parent.mkdir(parents=True, exist_ok=True)
+    with extracted.open("wb") as extracted_fd:
+        if mixer is None:
+            copyfileobj(source, extracted_fd, COPY_BUFSIZE)
+            return
+        while chunk := source.read(COPY_BUFSIZE):
+            extracted_fd.write(chunk)
+            mixer.update(chunk)
+
+
+@contextmanager
+def _open_tar(filename: Path, stream: bool) -> Iterator[tarfile.TarFile]:
+    if not str(filename).endswith(ZSTD_TAR_EXTENSIONS):
+        with tarfile.open(filename, "r|*" if stream else "r:*") as archive:
+            yield archive
+        return
+
+    # Older tarfile modules do not know about zstd, decompress the stream ourselves.
+    with _zstd_open(filename) as fileobj:
+        if stream:
+            with tarfile.open(fileobj=fileobj, mode="r|") as archive:
+                yield archive
+            return
+
+        # The zstd streams can't seek backwards, random access requires a copy.
+        with TemporaryFile() as tar_fd:
+            copyfileobj(fileobj, tar_fd, COPY_BUFSIZE)
+            tar_fd.seek(0)
+            with tarfile.open(fileobj=tar_fd, mode="r:") as archive:
+                yield archive
+
+
+def _extract_tar_member(filename: Path, member: str, extracted: Path):
+    # Read the archive as a stream, and stop decompressing as soon as the member
+    # has been written.
+    with _open_tar(filename, stream=True) as archive:
+        for info in archive:
+            if member_name(info.name) != member:
+                continue
+            if info.isfile():
+                source = archive.extractfile(info)
+                assert source is not None
+                save_member(source, extracted)
+                return
+            if not (info.issym() or info.islnk()):
+                return
+            break
+        else:
+            return
+
+    # Links targets may be located before the link, which requires random access.
+    logger.debug("Resolving archive link '%s'", member)
+    with _open_tar(filename, stream=False) as archive:
+        try:
+            source = archive.extractfile(info.name)
+        except KeyError:
+            logger.debug("Archive link '%s' target not found", member)
+            return
+        if source is not None:
+            save_member(source, extracted)
+
+
+def find_zip_member(archive: zipfile.ZipFile, member: str) -> zipfile.ZipInfo | None:
+    """
+    Find a file member of a zip archive by its normalized name.
+    """
+    for info in archive.infolist():
+        if member_name(info.filename) == member and not info.is_dir():
+            return info
+    return None
+
+
+def _extract_zip_member(filename: Path, member: str, extracted: Path):
+    with zipfile.ZipFile(filename) as archive:
+        info = find_zip_member(archive, member)
+        if info is not None:
+            with archive.open(info) as source:
+                save_member(source, extracted)
+
+
+def can_extract_member(filename: str | Path) -> bool:
+    """Whether a single member can be extracted from the archive file."""
+    name = str(filename)
+    return name.endswith(TAR_EXTENSIONS) or name.endswith(ZIP_EXTENSIONS)
+
+
+def extract_member(filename: str | Path, member: str, extract_dir: str | Path) -> Path:
+    """
+    Extract a single member from a tar or zip archive, without writing the other
+    members to disk. The returned path does not exist if the member was not found.
+    """
     filename = Path(filename)
     extract_dir = Path(extract_dir)
 
-    extracted = extract_dir / filename.stem
+    member = member_name(member)
+    extracted = member_path(extract_dir, member)
 
-    with filename.open("rb") as filename_fd:
-        with extracted.open("wb") as extracted_fd:
-            extracted_fd.write(gzip.decompress(filename_fd.read()))
+    logger.debug("Extracting member '%s' from '%s'", member, filename)
+    if str(filename).endswith(ZIP_EXTENSIONS):
+        _extract_zip_member(filename, member, extracted)
+    else:
+        _extract_tar_member(filename, member, extracted)
+
+    return extracted
 
 
 def register_unpack_formats():
@@ -42,6 +213,12 @@ def register_unpack_formats():
     if "gz" not in map(lambda x: x[0], formats):
         register_unpack_format("gz", [".gz"], _unpack_gzip, description="gzip files")
 
+    if "xz" not in map(lambda x: x[0], formats):
+        register_unpack_format("xz", [".xz"], _unpack_xz, description="xz files")
+
+    if "zst" not in map(lambda x: x[0], formats):
+        register_unpack_format("zst", [".zst"], _unpack_zstd, description="zstd files")
+
     logger.debug(
         "Unpack formats available: %s",
         flatten(o[1] for o in get_unpack_formats()),
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from gh_release_install.aio import AsyncGhReleaseInstall, run_async_batch
+from gh_release_install.main import new_session
+
+URL = "https://github.com/mvdan/sh/releases/download/v3.3.1"
+
+
+def test_async_installer_run(requests_mock, tmp_path: Path):
+    requests_mock.get(f"{URL}/shfmt_v3.3.1_linux_amd64", content=b"shfmt")
+
+    async def main():
+        with new_session() as session:
+            await AsyncGhReleaseInstall(
+                repository="mvdan/sh",
+                asset="shfmt_{tag}_linux_amd64",
+                destination=tmp_path / "shfmt",
+                version="v3.3.1",
+                session=session,
+            ).run()
+
+    asyncio.run(main())
+
+    assert (tmp_path / "shfmt").read_bytes() == b"shfmt"
+
+
+def test_run_async_batch(requests_mock, tmp_path: Path):
+    requests_mock.get(f"{URL}/shfmt_v3.3.1_linux_amd64", content=b"shfmt")
+    requests_mock.get(f"{URL}/missing", status_code=404)
+
+    entries = [
+        {
+            "repository": "mvdan/sh",
+            "asset": asset,
+            "destination": str(tmp_path / destination),
+            "version": "v3.3.1",
+        }
+        for asset, destination in (
+            ("shfmt_{tag}_linux_amd64", "shfmt"),
+            ("missing", "missing"),
+        )
+    ]
+    entries.append({**entries[0], "checksum": "sha999:abc"})
+    results = asyncio.run(run_async_batch(entries, workers=2))
+
+    assert [result.ok for result in results] == [True, False, False]
+    assert isinstance(results[2].error, ValueError)
+    assert (tmp_path / "shfmt").read_bytes() == b"shfmt"
+
+
+def test_run_async_batch_latest_resolved_once(requests_mock, tmp_path: Path):
+    latest_mock = requests_mock.get(
+        "https://api.github.com/repos/mvdan/sh/releases/latest",
+        json={"tag_name": "v3.3.1"},
+    )
+    requests_mock.get(f"{URL}/shfmt_v3.3.1_linux_amd64", content=b"shfmt")
+
+    entries = [
+        {
+            "repository": "mvdan/sh",
+            "asset": "shfmt_{tag}_linux_amd64",
+            "destination": str(tmp_path / f"shfmt-{index}"),
+        }
+        for index in range(3)
+    ]
+    results = asyncio.run(run_async_batch(entries, workers=2))
+
+    assert all(result.ok for result in results)
+    assert latest_mock.call_count == 1
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from gh_release_install import GhReleaseInstall
+from gh_release_install.audit import audit, manifest_targets, recorded_targets
+from gh_release_install.cache import Cache
+
+SHFMT_URL = (
+    "https://github.com/mvdan/sh/releases/download/v3.3.2/shfmt_v3.3.2_linux_amd64"
+)
+
+
+def test_audit_recorded_installs(requests_mock, tmp_path: Path):
+    requests_mock.get(SHFMT_URL, content=b"shfmt")
+    for name in ("shfmt", "shfmt-changed", "shfmt-removed"):
+        GhReleaseInstall(
+            repository="mvdan/sh",
+            asset="shfmt_{tag}_linux_amd64",
+            destination=tmp_path / name,
+            version="v3.3.2",
+            cache_dir=tmp_path / "cache",
+        ).run()
+
+    (tmp_path / "shfmt-changed").write_bytes(b"changed")
+    (tmp_path / "shfmt-removed").unlink()
+
+    results = audit(recorded_targets(Cache(tmp_path / "cache")), workers=2)
+
+    assert {result.destination.name: result.status for result in results} == {
+        "shfmt": "ok",
+        "shfmt-changed": "mismatch",
+        "shfmt-removed": "missing",
+    }
+    assert results[0].to_dict()["expected"] == hashlib.sha256(b"shfmt").hexdigest()
+
+
+def test_audit_manifest(tmp_path: Path):
+    (tmp_path / "shfmt").write_bytes(b"shfmt")
+    (tmp_path / "prometheus").write_bytes(b"prometheus")
+    entries = [
+        {
+            "repository": "mvdan/sh",
+            "asset": "shfmt_{tag}_linux_amd64",
+            "destination": str(tmp_path / "shfmt"),
+            "version": "v3.3.2",
+            "checksum": f"sha256:{hashlib.sha256(b'shfmt').hexdigest()}",
+        },
+        {
+            "repository": "prometheus/prometheus",
+            "asset": "prometheus-{version}.linux-amd64.tar.gz",
+            "extract": "prometheus-{version}.linux-amd64/prometheus",
+            "destination": str(tmp_path / "prometheus"),
+            "version": "v2.28.1",
+            "checksum": "sha256:sha256sums.txt",
+        },
+    ]
+
+    results = audit(manifest_targets(entries, Cache(tmp_path / "cache")))
+
+    # The asset checksum does not apply to the extracted file.
+    assert [result.status for result in results] == ["ok", "unknown"]
+    assert all(result.ok for result in results)
+
+
+def test_audit_manifest_invalid_entry(tmp_path: Path):
+    (tmp_path / "shfmt").write_bytes(b"shfmt")
+    entries = [
+        {
+            "repository": "mvdan/sh",
+            "asset": "shfmt_{tag}_linux_amd64",
+            "destination": str(tmp_path / name),
+            "version": "v3.3.2",
+            "checksum": checksum,
+        }
+        for name, checksum in (
+            ("shfmt", f"sha256:{hashlib.sha256(b'shfmt').hexdigest()}"),
+            ("invalid", "sha999:abc"),
+        )
+    ]
+
+    results = audit(manifest_targets(entries))
+
+    assert [result.status for result in results] == ["ok", "error"]
+    assert results[1].error == "invalid checksum algorithm sha999"
+
+
+def test_audit_manifest_latest(requests_mock, tmp_path: Path):
+    latest_url = "https://api.github.com/repos/mvdan/sh/releases/latest"
+    requests_mock.get(latest_url, json={"tag_name": "v3.3.2"})
+    requests_mock.get(SHFMT_URL, content=b"shfmt")
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.2/sha256sums.txt",
+        text=f"{hashlib.sha256(b'shfmt').hexdigest()}  shfmt_v3.3.2_linux_amd64\n",
+    )
+    entries = [
+        {
+            "repository": "mvdan/sh",
+            "asset": "shfmt_{tag}_linux_amd64",
+            "destination": str(tmp_path / name),
+            "checksum": "sha256:sha256sums.txt",
+        }
+        for name in ("shfmt", "shfmt-unrecorded")
+    ]
+    GhReleaseInstall(
+        repository="mvdan/sh",
+        asset="shfmt_{tag}_linux_amd64",
+        destination=tmp_path / "shfmt",
+        checksum="sha256:sha256sums.txt",
+        cache_dir=tmp_path / "cache",
+    ).run()
+    (tmp_path / "shfmt-unrecorded").write_bytes(b"shfmt")
+
+    # A newer release does not change the expected digest of the installed release.
+    latest_mock = requests_mock.get(latest_url, json={"tag_name": "v3.3.3"})
+    results = audit(manifest_targets(entries, Cache(tmp_path / "cache")))
+
+    assert [result.status for result in results] == ["ok", "unknown"]
+    assert latest_mock.call_count == 0
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from requests_mock import ANY
+
+from gh_release_install.main import new_session
+
+
+def test_token_sent_to_github_hosts(requests_mock, monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "secret")
+    requests_mock.get(ANY)
+
+    api_urls = [
+        "http://mirror.local/api",
+        "https://mirror.local/api",
+        "https://ghe.example.com/api/v3",
+        "https://api.github.com",
+    ]
+    with new_session(api_urls=api_urls) as session:
+        for url in api_urls + [
+            "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt",
+            "https://objects.githubusercontent.com/shfmt",
+        ]:
+            session.get(url)
+
+    assert {
+        request.url: request.headers.get("Authorization")
+        for request in requests_mock.request_history
+    } == {
+        "http://mirror.local/api": None,
+        "https://mirror.local/api": None,
+        "https://ghe.example.com/api/v3": "token secret",
+        "https://api.github.com/": "token secret",
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt": "token secret",
+        "https://objects.githubusercontent.com/shfmt": None,
+    }
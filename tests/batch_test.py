@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from gh_release_install.batch import check_batch, load_manifest, run_batch
+from gh_release_install.metrics import format_prometheus
+
+
+def test_load_manifest_json(tmp_path: Path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps(
+            [
+                {
+                    "repository": "mvdan/sh",
+                    "asset": "shfmt_{tag}_linux_amd64",
+                    "destination": "/usr/local/bin/shfmt",
+                    "version": "v3.3.1",
+                }
+            ]
+        )
+    )
+
+    entries = load_manifest(manifest)
+
+    assert len(entries) == 1
+    assert entries[0]["version"] == "v3.3.1"
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="requires tomllib")
+def test_load_manifest_toml(tmp_path: Path):
+    manifest = tmp_path / "manifest.toml"
+    manifest.write_text(
+        "[[install]]\n"
+        'repository = "mvdan/sh"\n'
+        'asset = "shfmt_{tag}_linux_amd64"\n'
+        'destination = "/usr/local/bin/shfmt"\n'
+        "\n"
+        "[[install]]\n"
+        'repository = "prometheus/prometheus"\n'
+        'asset = "prometheus-{version}.linux-amd64.tar.gz"\n'
+        'extract = "prometheus-{version}.linux-amd64/prometheus"\n'
+        'destination = "/usr/local/bin/prometheus"\n'
+    )
+
+    entries = load_manifest(manifest)
+
+    assert [entry["repository"] for entry in entries] == [
+        "mvdan/sh",
+        "prometheus/prometheus",
+    ]
+
+
+@pytest.mark.parametrize(
+    "entry, error",
+    [
+        pytest.param(
+            {"repository": "mvdan/sh", "asset": "shfmt", "dest": "shfmt"},
+            "unknown fields",
+            id="unknown field",
+        ),
+        pytest.param(
+            {"repository": "mvdan/sh", "asset": "shfmt"},
+            "missing fields",
+            id="missing field",
+        ),
+    ],
+)
+def test_load_manifest_invalid(tmp_path: Path, entry, error):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps([entry]))
+
+    with pytest.raises(ValueError, match=error):
+        load_manifest(manifest)
+
+
+def test_run_batch(requests_mock, tmp_path: Path):
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_v3.3.1_linux_amd64",
+        content=b"shfmt",
+    )
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/missing",
+        status_code=404,
+    )
+
+    results = run_batch(
+        [
+            {
+                "repository": "mvdan/sh",
+                "asset": "shfmt_{tag}_linux_amd64",
+                "destination": str(tmp_path / "shfmt"),
+                "version": "v3.3.1",
+            },
+            {
+                "repository": "mvdan/sh",
+                "asset": "missing",
+                "destination": str(tmp_path / "missing"),
+                "version": "v3.3.1",
+            },
+        ],
+        workers=2,
+    )
+
+    assert [result.ok for result in results] == [True, False]
+    assert (tmp_path / "shfmt").read_bytes() == b"shfmt"
+    assert not (tmp_path / "missing").exists()
+
+    runs = [result.metrics for result in results if result.metrics is not None]
+    assert [(m.status, m.tag, m.downloaded_bytes) for m in runs] == [
+        ("installed", "v3.3.1", 5),
+        ("failed", "v3.3.1", 0),
+    ]
+    assert runs[0].phases
+    prometheus = format_prometheus(runs)
+    assert (
+        'gh_release_install_success{repository="mvdan/sh",asset="missing",'
+        f'destination="{tmp_path / "missing"}"}} 0'
+    ) in prometheus
+
+
+def test_run_batch_invalid_entry(requests_mock, tmp_path: Path):
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_v3.3.1_linux_amd64",
+        content=b"shfmt",
+    )
+
+    results = run_batch(
+        [
+            {
+                "repository": "mvdan/sh",
+                "asset": "shfmt_{tag}_linux_amd64",
+                "destination": str(tmp_path / name),
+                "version": "v3.3.1",
+                "checksum": checksum,
+            }
+            for name, checksum in (("shfmt", None), ("invalid", "sha999:abc"))
+        ],
+    )
+
+    assert [result.ok for result in results] == [True, False]
+    assert isinstance(results[1].error, ValueError)
+    assert (tmp_path / "shfmt").read_bytes() == b"shfmt"
+
+    results = check_batch([result.entry for result in results])
+
+    assert [result.ok for result in results] == [False, False]
+    assert isinstance(results[1].error, ValueError)
+
+
+def test_check_batch(requests_mock, tmp_path: Path):
+    requests_mock.get(
+        "https://api.github.com/repos/mvdan/sh/releases/latest",
+        json={"tag_name": "v3.3.1"},
+    )
+    for name, version in (("shfmt", "v3.3.1"), ("gosh", "v3.3.0")):
+        (tmp_path / name).write_bytes(b"binary")
+        (tmp_path / f"{name}.version").write_text(version)
+
+    results = check_batch(
+        [
+            {
+                "repository": "mvdan/sh",
+                "asset": name,
+                "destination": str(tmp_path / name),
+                "version_file": "{destination}.version",
+            }
+            for name in ("shfmt", "gosh")
+        ]
+    )
+
+    assert [result.ok for result in results] == [True, False]
+    assert str(results[1].error) == "version v3.3.1 is not installed"
+    assert requests_mock.call_count == 1
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from gh_release_install import cache as cache_module
+from gh_release_install.cache import Cache, clone_file, file_lock, parse_size
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("1024", 1024),
+        ("500M", 500 * 1024**2),
+        ("2G", 2 * 1024**3),
+        ("2GiB", 2 * 1024**3),
+        ("10kb", 10 * 1024),
+    ],
+)
+def test_parse_size(value, expected):
+    assert parse_size(value) == expected
+
+
+def test_parse_size_invalid():
+    with pytest.raises(ValueError):
+        parse_size("2 apples")
+
+
+def test_cache_put_get(tmp_path: Path):
+    cache = Cache(tmp_path / "cache")
+    asset = tmp_path / "asset"
+    asset.write_bytes(b"content")
+
+    assert cache.get("mvdan/sh", "v3.3.1", "shfmt") is None
+
+    cache.put("mvdan/sh", "v3.3.1", "shfmt", asset)
+    cached = cache.get("mvdan/sh", "v3.3.1", "shfmt")
+
+    assert cached is not None
+    assert cached.read_bytes() == b"content"
+    assert cache.get("mvdan/sh", "v3.3.2", "shfmt") is None
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["size"] == len(b"content")
+
+
+def test_cache_get_corrupted(tmp_path: Path):
+    cache = Cache(tmp_path / "cache")
+    asset = tmp_path / "asset"
+    asset.write_bytes(b"content")
+
+    cached = cache.put("mvdan/sh", "v3.3.1", "shfmt", asset)
+    cached.write_bytes(b"corrupted")
+
+    assert cache.get("mvdan/sh", "v3.3.1", "shfmt") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_prune_lru(tmp_path: Path):
+    cache = Cache(tmp_path / "cache", max_size=20)
+    asset = tmp_path / "asset"
+    asset.write_bytes(b"0123456789")
+
+    first = cache.put("mvdan/sh", "v1", "shfmt", asset)
+    second = cache.put("mvdan/sh", "v2", "shfmt", asset)
+    os.utime(first, (1, 1))
+    os.utime(second, (2, 2))
+
+    # Using the first entry makes the second one the least recently used
+    assert cache.get("mvdan/sh", "v1", "shfmt") is not None
+    cache.put("mvdan/sh", "v3", "shfmt", asset)
+
+    assert cache.get("mvdan/sh", "v1", "shfmt") is not None
+    assert cache.get("mvdan/sh", "v2", "shfmt") is None
+    assert cache.get("mvdan/sh", "v3", "shfmt") is not None
+
+    assert len(cache.prune()) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_put_larger_than_max_size(tmp_path: Path):
+    cache = Cache(tmp_path / "cache", max_size=5)
+    asset = tmp_path / "asset"
+    asset.write_bytes(b"0123456789")
+
+    first = cache.put("mvdan/sh", "v1", "shfmt", asset)
+    os.utime(first, (1, 1))
+    second = cache.put("mvdan/sh", "v2", "shfmt", asset)
+
+    # The entry just added is kept, the older ones are evicted.
+    assert not first.exists()
+    assert second.read_bytes() == b"0123456789"
+
+
+def test_cache_prune_concurrent_removal(tmp_path: Path, monkeypatch):
+    cache = Cache(tmp_path / "cache", max_size=20)
+    asset = tmp_path / "asset"
+    asset.write_bytes(b"0123456789")
+    evicted = cache.put("mvdan/sh", "v1", "shfmt", asset)
+    kept = cache.put("mvdan/sh", "v2", "shfmt", asset)
+    partial = tmp_path / "cache/partial/shfmt"
+    partial.parent.mkdir()
+    partial.write_bytes(b"012")
+
+    # Another process removes the files once listed, before they are stat'ed.
+    removed = {evicted, partial}
+    stat = Path.stat
+
+    def racing_stat(path, *args, **kwargs):
+        if path in removed:
+            raise FileNotFoundError(path)
+        return stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "stat", racing_stat)
+
+    assert [entry.path for entry in cache.entries()] == [kept]
+    assert not cache.prune(20)
+
+
+def test_cache_file_checksum(tmp_path: Path, monkeypatch):
+    cache = Cache(tmp_path / "cache")
+    filepath = tmp_path / "file"
+    filepath.write_bytes(b"content")
+
+    digest = cache.file_checksum("sha256", filepath)
+    assert digest == hashlib.sha256(b"content").hexdigest()
+
+    def compute_file_checksum(*args):
+        raise AssertionError("file was hashed again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(cache_module, "compute_file_checksum", compute_file_checksum)
+        assert cache.file_checksum("sha256", filepath) == digest
+
+    filepath.write_bytes(b"changed content")
+    assert cache.file_checksum("sha256", filepath) != digest
+
+
+def test_clone_file(tmp_path: Path):
+    src = tmp_path / "src"
+    src.write_bytes(b"content")
+
+    clone_file(src, tmp_path / "dst")
+
+    assert (tmp_path / "dst").read_bytes() == b"content"
+
+
+LOCK_HOLDER_SCRIPT = """
+import os
+import sys
+from pathlib import Path
+
+from gh_release_install.cache import file_lock
+
+with file_lock(Path(sys.argv[1])) as locked:
+    assert locked
+    print("locked", flush=True)
+    if sys.argv[2] == "crash":
+        os._exit(1)
+    sys.stdin.readline()
+"""
+
+
+def _start_lock_holder(path: Path, mode: str) -> subprocess.Popen:
+    holder = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "-c", LOCK_HOLDER_SCRIPT, str(path), mode],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert holder.stdout is not None
+    assert holder.stdout.readline() == "locked\n"
+    return holder
+
+
+def test_file_lock_held(tmp_path: Path):
+    path = tmp_path / "locks" / "asset"
+    holder = _start_lock_holder(path, "hold")
+    try:
+        with file_lock(path, timeout=0.2) as locked:
+            assert not locked
+    finally:
+        holder.communicate("\n")
+
+    with file_lock(path, timeout=0.2) as locked:
+        assert locked
+
+
+def test_file_lock_crashed_holder(tmp_path: Path):
+    path = tmp_path / "locks" / "asset"
+    holder = _start_lock_holder(path, "crash")
+    holder.wait()
+
+    with file_lock(path, timeout=0.2) as locked:
+        assert locked
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 from pathlib import Path
 
 import pytest
@@ -7,6 +8,9 @@ import pytest
 from gh_release_install.checksum import (
     compute_file_checksum,
     find_checksum_in_file,
+    infer_algorithm,
+    lookup_checksum,
+    parse_checksum_file,
     parse_checksum_option,
 )
 
@@ -24,6 +28,10 @@ here = Path(__file__).parent
             "sha256:https://example.org/SHA256SUMS",
             ("sha256", "https://example.org/SHA256SUMS"),
         ),
+        (
+            "382b1c013eec3d67ac05f9a3266ad1fa0707ce95",
+            ("sha1", "382b1c013eec3d67ac05f9a3266ad1fa0707ce95"),
+        ),
     ],
 )
 def test_parse_checksum_option(value, expected):
@@ -97,3 +105,51 @@ def test_compute_file_checksum(hash_name, expected):
 )
 def test_find_checksum_in_file(content, expected):
     assert find_checksum_in_file(content, "test.txt.bz2") == expected
+
+
+def test_parse_checksum_file():
+    sha512 = hashlib.sha512(b"bsd").hexdigest()
+    blake2b = hashlib.blake2b(b"blake2").hexdigest()
+    index = parse_checksum_file(
+        "3a49580590b7b002b74db6195c1a8e15  gnu.txt\n"
+        "3A49580590B7B002B74DB6195C1A8E15 *binary.txt\n"
+        "SHA256 (bsd.txt) = "
+        "484aedc04288b02f69eee1c20e98c588125fa960b43e5e129d5d36b93bb62072\n"
+        f"SHA512 (bsd.txt) = {sha512}\n"
+        "SHA512 (invalid.txt) = 3a49580590b7b002b74db6195c1a8e15\n"
+        f"BLAKE2b (blake2.txt) = {blake2b}\n"
+        "382b1c013eec3d67ac05f9a3266ad1fa0707ce95  ./dist/nested.txt\n"
+        "3a49580590b7b002  short.txt\n"
+        "\n"
+        "not a checksum line\n"
+    )
+
+    assert index == {
+        "gnu.txt": {"md5": "3a49580590b7b002b74db6195c1a8e15"},
+        "binary.txt": {"md5": "3a49580590b7b002b74db6195c1a8e15"},
+        "bsd.txt": {
+            "sha256": "484aedc04288b02f69eee1c20e98c588125fa960b43e5e129d5d36b93bb62072",
+            "sha512": sha512,
+        },
+        "dist/nested.txt": {"sha1": "382b1c013eec3d67ac05f9a3266ad1fa0707ce95"},
+        "nested.txt": {"sha1": "382b1c013eec3d67ac05f9a3266ad1fa0707ce95"},
+    }
+    assert lookup_checksum(index, "./gnu.txt", "md5") == index["gnu.txt"]["md5"]
+    assert lookup_checksum(index, "bsd.txt", "sha512") == sha512
+    # A digest of another algorithm is never used.
+    assert lookup_checksum(index, "gnu.txt", "sha256") is None
+    assert lookup_checksum(index, "missing.txt", "md5") is None
+
+
+@pytest.mark.parametrize(
+    "digest, expected",
+    [
+        ("3a49580590b7b002b74db6195c1a8e15", "md5"),
+        ("382b1c013eec3d67ac05f9a3266ad1fa0707ce95", "sha1"),
+        ("484aedc04288b02f69eee1c20e98c588125fa960b43e5e129d5d36b93bb62072", "sha256"),
+        ("3a49580590b7b002", None),
+        ("not-a-digest", None),
+    ],
+)
+def test_infer_algorithm(digest, expected):
+    assert infer_algorithm(digest) == expected
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from gh_release_install.batch import MANIFEST_FIELDS
+from gh_release_install.cli import batch_parser
+
+FAST_PATH_SCRIPT = """
+import json
+import sys
+
+from gh_release_install.cli import run
+
+try:
+    run()
+except SystemExit as exception:
+    assert exception.code in (None, 0), exception.code
+
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def test_installed_fast_path_imports(tmp_path: Path):
+    destination = tmp_path / "rclone"
+    destination.write_text("binary", encoding="utf-8")
+    version_file = tmp_path / "rclone.version"
+    version_file.write_text("v1.57.0", encoding="utf-8")
+
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            FAST_PATH_SCRIPT,
+            "rclone/rclone",
+            "rclone-{tag}-linux-amd64.zip",
+            str(destination),
+            "--version=v1.57.0",
+            f"--version-file={version_file}",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    modules = set(json.loads(output))
+
+    for module in ("requests", "urllib3", "tarfile", "gh_release_install.unpack"):
+        assert module not in modules
+
+
+def test_batch_help_manifest_fields():
+    # pylint: disable=protected-access
+    (manifest,) = [
+        action for action in batch_parser._actions if action.dest == "manifest"
+    ]
+    listed = set(re.findall(r"\w+", manifest.help.split(":", 1)[1])) - {"and"}
+
+    assert listed == set(MANIFEST_FIELDS)
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
+
+import pytest
+from requests import Response, Session, exceptions
+
+from gh_release_install import download as download_module
+from gh_release_install.checksum import new_checksum
+from gh_release_install.download import MAX_BUFFER_SIZE, download, iter_response
+
+URL = "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt"
+CDN_URL = "https://objects.githubusercontent.com/shfmt"
+
+CONTENT = os.urandom(1024 * 1024 + 17)
+
+
+def _range_callback(request, context):
+    assert "Authorization" not in request.headers
+    start, end = request.headers["Range"].removeprefix("bytes=").split("-")
+    context.status_code = 206
+    context.headers["Content-Range"] = f"bytes {start}-{end}/{len(CONTENT)}"
+    return CONTENT[int(start) : int(end) + 1]
+
+
+@pytest.fixture(name="segmented")
+def fixture_segmented(monkeypatch):
+    monkeypatch.setattr(download_module, "SEGMENTED_MIN_SIZE", 1024)
+
+
+class BodyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections: set[int] = set()
+
+    # pylint: disable=invalid-name
+    def do_GET(self):
+        BodyHandler.connections.add(id(self.connection))
+        body, headers = CONTENT, {"Content-Length": str(len(CONTENT))}
+        if self.path == "/gzip":
+            body = gzip.compress(CONTENT)
+            headers = {"Content-Length": str(len(body)), "Content-Encoding": "gzip"}
+        elif self.path == "/truncated":
+            body = CONTENT[:1000]
+            self.close_connection = True
+
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture(name="server_url")
+def fixture_server_url():
+    BodyHandler.connections = set()
+    with ThreadingHTTPServer(("127.0.0.1", 0), BodyHandler) as server:
+        Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            yield f"http://127.0.0.1:{server.server_address[1]}"
+        finally:
+            server.shutdown()
+
+
+def _iter_content(*args, **kwargs):
+    raise AssertionError("body read with iter_content")
+
+
+def test_iter_response(server_url: str, monkeypatch):
+    monkeypatch.setattr(Response, "iter_content", _iter_content)
+
+    with Session() as session:
+        for _ in range(2):
+            content = bytearray()
+            with session.get(f"{server_url}/asset", stream=True) as res:
+                for chunk in iter_response(res):
+                    assert len(chunk) <= MAX_BUFFER_SIZE
+                    content += chunk
+
+            assert content == CONTENT
+
+    # The connection is handed back to the pool once the body is read.
+    assert len(BodyHandler.connections) == 1
+
+
+def test_iter_response_content_encoding(server_url: str):
+    with Session() as session, session.get(f"{server_url}/gzip", stream=True) as res:
+        content = b"".join(iter_response(res))
+
+    assert content == CONTENT
+
+
+def test_iter_response_truncated(server_url: str, monkeypatch):
+    monkeypatch.setattr(Response, "iter_content", _iter_content)
+
+    with Session() as session:
+        with session.get(f"{server_url}/truncated", stream=True) as res:
+            with pytest.raises(exceptions.ChunkedEncodingError):
+                b"".join(iter_response(res))
+
+
+def test_iter_response_fallback(requests_mock):
+    requests_mock.get(URL, content=CONTENT)
+
+    with Session() as session, session.get(URL, stream=True) as res:
+        content = b"".join(iter_response(res))
+
+    assert content == CONTENT
+
+
+def test_download_single_stream(requests_mock, tmp_path: Path):
+    requests_mock.get(URL, content=CONTENT)
+    mixer = new_checksum("sha256")
+
+    with Session() as session:
+        download(session, URL, tmp_path / "shfmt", mixer)
+
+    assert (tmp_path / "shfmt").read_bytes() == CONTENT
+    assert mixer.hexdigest() == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_download_segmented(requests_mock, tmp_path: Path, segmented):
+    # pylint: disable=unused-argument
+    requests_mock.get(
+        URL,
+        status_code=302,
+        headers={"Location": CDN_URL},
+    )
+    requests_mock.get(
+        CDN_URL,
+        [
+            {
+                "content": CONTENT,
+                "headers": {
+                    "Accept-Ranges": "bytes",
+                    "Content-Length": str(len(CONTENT)),
+                },
+            },
+            {"content": _range_callback},
+        ],
+    )
+    mixer = new_checksum("sha256")
+
+    with Session() as session:
+        session.headers["Authorization"] = "token secret"
+        download(session, URL, tmp_path / "shfmt", mixer, connections=4)
+
+    assert (tmp_path / "shfmt").read_bytes() == CONTENT
+    assert mixer.hexdigest() == hashlib.sha256(CONTENT).hexdigest()
+    assert requests_mock.call_count == 2 + 4
+
+
+def test_download_segmented_fallback(requests_mock, tmp_path: Path, segmented):
+    # pylint: disable=unused-argument
+    requests_mock.get(
+        URL,
+        content=CONTENT,
+        headers={"Accept-Ranges": "bytes", "Content-Length": str(len(CONTENT))},
+    )
+
+    with Session() as session:
+        download(session, URL, tmp_path / "shfmt", connections=4)
+
+    assert (tmp_path / "shfmt").read_bytes() == CONTENT
+
+
+class InterruptedBody(io.BytesIO):
+    def __init__(self, content: bytes, size: int):
+        super().__init__(content[:size])
+
+    def read(self, *args, **kwargs):
+        blob = super().read(*args, **kwargs)
+        if not blob:
+            raise OSError("connection reset")
+        return blob
+
+
+def _resume_callback(request, context):
+    start = int(request.headers["Range"].removeprefix("bytes=").rstrip("-"))
+    assert request.headers["If-Range"] == '"abc"'
+    context.status_code = 206
+    context.headers["Content-Range"] = (
+        f"bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}"
+    )
+    return CONTENT[start:]
+
+
+RESUMABLE_HEADERS = {
+    "Accept-Ranges": "bytes",
+    "Content-Length": str(len(CONTENT)),
+    "ETag": '"abc"',
+}
+
+
+def test_download_resume_interrupted(requests_mock, tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(download_module, "CHUNK_SIZE", 100)
+    requests_mock.get(
+        URL,
+        [
+            {"body": InterruptedBody(CONTENT, 1000), "headers": RESUMABLE_HEADERS},
+            {"content": _resume_callback},
+        ],
+    )
+    mixer = new_checksum("sha256")
+
+    with Session() as session:
+        download(session, URL, tmp_path / "shfmt", mixer, connections=1)
+
+    assert (tmp_path / "shfmt").read_bytes() == CONTENT
+    assert mixer.hexdigest() == hashlib.sha256(CONTENT).hexdigest()
+    assert requests_mock.call_count == 2
+    # The download resumes after the last chunk written before the interruption.
+    assert requests_mock.request_history[1].headers["Range"] == "bytes=1000-"
+
+
+def test_download_resume_partial(requests_mock, tmp_path: Path):
+    partial = tmp_path / "partial"
+    partial.write_bytes(CONTENT[:1000])
+    (tmp_path / "partial.json").write_text(
+        json.dumps(
+            {
+                "url": URL,
+                "etag": '"abc"',
+                "last_modified": None,
+                "length": len(CONTENT),
+                "ranges": True,
+            }
+        )
+    )
+    requests_mock.get(URL, content=_resume_callback)
+    mixer = new_checksum("sha256")
+
+    with Session() as session:
+        download(session, URL, tmp_path / "shfmt", mixer, partial=partial)
+
+    assert (tmp_path / "shfmt").read_bytes() == CONTENT
+    assert mixer.hexdigest() == hashlib.sha256(CONTENT).hexdigest()
+    assert not partial.exists()
+    assert not (tmp_path / "partial.json").exists()
+
+
+def test_download_partial_without_validator(requests_mock, tmp_path: Path):
+    partial = tmp_path / "partial"
+    partial.write_bytes(b"x" * 1000)
+    (tmp_path / "partial.json").write_text(
+        json.dumps(
+            {
+                "url": URL,
+                "etag": None,
+                "last_modified": None,
+                "length": len(CONTENT),
+                "ranges": True,
+            }
+        )
+    )
+    requests_mock.get(URL, content=CONTENT)
+
+    with Session() as session:
+        download(session, URL, tmp_path / "shfmt", partial=partial)
+
+    assert (tmp_path / "shfmt").read_bytes() == CONTENT
+    assert "Range" not in requests_mock.last_request.headers
+
+
+def test_download_keep_partial(requests_mock, tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(download_module, "CHUNK_SIZE", 100)
+    partial = tmp_path / "partial"
+    requests_mock.get(
+        URL,
+        body=InterruptedBody(CONTENT, 1000),
+        headers={"Content-Length": str(len(CONTENT)), "ETag": '"abc"'},
+    )
+
+    with Session() as session:
+        with pytest.raises(exceptions.ChunkedEncodingError):
+            download(session, URL, tmp_path / "shfmt", partial=partial)
+
+    assert partial.read_bytes() == CONTENT[:1000]
+    assert json.loads((tmp_path / "partial.json").read_text())["etag"] == '"abc"'
@@ -2,10 +2,21 @@
 
 from __future__ import annotations
 
+import hashlib
+import io
 import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from gh_release_install import GhReleaseInstall
+import pytest
+from requests import Session, exceptions
+
+from gh_release_install import GhReleaseInstall, cache as cache_module, main
+from gh_release_install.cache import Cache
+from gh_release_install.checksum import compute_file_checksum
+from gh_release_install.main import get_latest_tag
+from gh_release_install.metrics import Metrics
 
 
 def _load_json_fixture(path: str) -> dict:
@@ -65,3 +76,576 @@ def test_installer_get_local_version_exists(
     assert installer._local is not None
     assert installer._local.tag == "v2.28.1"
     assert installer._local.version == "2.28.1"
+
+
+def test_installer_download_release_asset_checksum(
+    requests_mock,
+    tmp_path: Path,
+    installer: GhReleaseInstall,
+):
+    installer._version = "v2.28.1"
+    installer._get_target_version()
+    requests_mock.get(
+        "https://github.com/prometheus/prometheus/releases/download/v2.28.1/"
+        "prometheus-2.28.1.linux-amd64.tar.gz",
+        content=b"Hello World\n",
+    )
+
+    asset_file, mixer = installer._download_release_asset(tmp_path, "sha256")
+
+    assert asset_file.read_bytes() == b"Hello World\n"
+    assert mixer.hexdigest() == compute_file_checksum("sha256", asset_file)
+
+
+def test_installer_download_release_asset_cache(
+    requests_mock,
+    tmp_path: Path,
+    installer: GhReleaseInstall,
+):
+    installer._cache = Cache(tmp_path / "cache")
+    installer._version = "v2.28.1"
+    installer._get_target_version()
+    asset_mock = requests_mock.get(
+        "https://github.com/prometheus/prometheus/releases/download/v2.28.1/"
+        "prometheus-2.28.1.linux-amd64.tar.gz",
+        content=b"Hello World\n",
+    )
+
+    for name in ("first", "second"):
+        (tmp_path / name).mkdir()
+        asset_file, mixer = installer._download_release_asset(tmp_path / name, "sha256")
+
+        assert asset_file.read_bytes() == b"Hello World\n"
+        assert mixer.hexdigest() == compute_file_checksum("sha256", asset_file)
+
+    assert asset_mock.call_count == 1
+
+
+def test_get_latest_tag_conditional(requests_mock, tmp_path: Path):
+    cache = Cache(tmp_path)
+    url = "https://api.github.com/repos/prometheus/prometheus/releases/latest"
+    requests_mock.get(
+        url,
+        json=_load_json_fixture("tests/fixtures/gh_releases_latest.json"),
+        headers={"ETag": '"abc"'},
+    )
+    with Session() as session:
+        assert get_latest_tag(session, "prometheus/prometheus", cache) == "v2.28.1"
+
+        requests_mock.get(url, status_code=304)
+        assert get_latest_tag(session, "prometheus/prometheus", cache) == "v2.28.1"
+        assert get_latest_tag(session, "prometheus/prometheus", cache) == "v2.28.1"
+
+    assert requests_mock.call_count == 3
+    # The not modified responses without validators keep the stored validators.
+    assert requests_mock.last_request.headers["If-None-Match"] == '"abc"'
+
+
+def test_get_latest_tag_ttl(requests_mock, tmp_path: Path):
+    cache = Cache(tmp_path)
+    requests_mock.get(
+        "https://api.github.com/repos/prometheus/prometheus/releases/latest",
+        json=_load_json_fixture("tests/fixtures/gh_releases_latest.json"),
+    )
+    with Session() as session:
+        for _ in range(3):
+            tag = get_latest_tag(session, "prometheus/prometheus", cache, ttl=60)
+            assert tag == "v2.28.1"
+
+    assert requests_mock.call_count == 1
+
+
+def test_installer_checksum_file_fetched_once(requests_mock, tmp_path: Path):
+    main._checksum_files.clear()
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_linux_amd64",
+        content=b"shfmt",
+    )
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/gofmt_linux_amd64",
+        content=b"gofmt",
+    )
+    checksum_mock = requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/sha256sums.txt",
+        text=(
+            f"{hashlib.sha256(b'shfmt').hexdigest()}  shfmt_linux_amd64\n"
+            f"{hashlib.sha256(b'gofmt').hexdigest()}  gofmt_linux_amd64\n"
+        ),
+    )
+
+    with Session() as session:
+        for name in ("shfmt", "gofmt"):
+            GhReleaseInstall(
+                repository="mvdan/sh",
+                asset=f"{name}_linux_amd64",
+                destination=tmp_path / name,
+                version="v3.3.1",
+                checksum="sha256:sha256sums.txt",
+                session=session,
+            ).run()
+            assert (tmp_path / name).read_bytes() == name.encode()
+
+    assert checksum_mock.call_count == 1
+
+
+def test_installer_checksum_file_missing_not_kept(requests_mock, tmp_path: Path):
+    main._checksum_files.clear()
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_linux_amd64",
+        content=b"shfmt",
+    )
+    checksum_url = "https://github.com/mvdan/sh/releases/download/v3.3.1/sha256sums.txt"
+    missing_mock = requests_mock.get(checksum_url, status_code=404)
+    installer = GhReleaseInstall(
+        repository="mvdan/sh",
+        asset="shfmt_linux_amd64",
+        destination=tmp_path / "shfmt",
+        version="v3.3.1",
+        checksum="sha256:sha256sums.txt",
+    )
+    with pytest.raises(SystemExit):
+        installer.run()
+
+    assert missing_mock.call_count == 1
+
+    # The missing checksum file is looked up again once it is published.
+    checksum_mock = requests_mock.get(
+        checksum_url,
+        text=f"{hashlib.sha256(b'shfmt').hexdigest()}  shfmt_linux_amd64\n",
+    )
+    installer.run()
+    installer.run()
+
+    assert (tmp_path / "shfmt").read_bytes() == b"shfmt"
+    assert checksum_mock.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "algorithm, installed",
+    [
+        pytest.param("sha512", True, id="listed"),
+        pytest.param("sha256", False, id="weaker"),
+        pytest.param("sha384", False, id="stronger"),
+    ],
+)
+def test_installer_checksum_file_algorithm(
+    requests_mock,
+    tmp_path: Path,
+    algorithm: str,
+    installed: bool,
+):
+    main._checksum_files.clear()
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_linux_amd64",
+        content=b"shfmt",
+    )
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/CHECKSUMS",
+        text=(
+            f"MD5 (shfmt_linux_amd64) = {hashlib.md5(b'shfmt').hexdigest()}\n"
+            f"SHA512 (shfmt_linux_amd64) = {hashlib.sha512(b'shfmt').hexdigest()}\n"
+        ),
+    )
+    installer = GhReleaseInstall(
+        repository="mvdan/sh",
+        asset="shfmt_linux_amd64",
+        destination=tmp_path / "shfmt",
+        version="v3.3.1",
+        checksum=f"{algorithm}:CHECKSUMS",
+    )
+
+    # Only a digest of the checksum algorithm is accepted.
+    if installed:
+        installer.run()
+        assert (tmp_path / "shfmt").read_bytes() == b"shfmt"
+    else:
+        with pytest.raises(SystemExit):
+            installer.run()
+        assert not (tmp_path / "shfmt").exists()
+
+
+def test_installer_skip_matching_destination(requests_mock, tmp_path: Path):
+    destination = tmp_path / "shfmt"
+    destination.write_bytes(b"shfmt")
+    installer = GhReleaseInstall(
+        repository="mvdan/sh",
+        asset="shfmt_{tag}_linux_amd64",
+        destination=destination,
+        version="v3.3.1",
+        version_file="{destination}.version",
+        checksum=f"sha256:{hashlib.sha256(b'shfmt').hexdigest()}",
+    )
+
+    installer.run()
+
+    assert requests_mock.call_count == 0
+    assert (tmp_path / "shfmt.version").read_text() == "v3.3.1"
+
+
+def test_installer_replace_destination(requests_mock, tmp_path: Path):
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_v3.3.1_linux_amd64",
+        content=b"new shfmt",
+    )
+    destination = tmp_path / "shfmt"
+    destination.write_bytes(b"old shfmt")
+
+    GhReleaseInstall(
+        repository="mvdan/sh",
+        asset="shfmt_{tag}_linux_amd64",
+        destination=destination,
+        version="v3.3.1",
+        mode="750",
+    ).run()
+
+    assert destination.read_bytes() == b"new shfmt"
+    assert destination.stat().st_mode & 0o777 == 0o750
+    assert list(tmp_path.iterdir()) == [destination]
+
+
+def test_installer_metrics(requests_mock, tmp_path: Path):
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_v3.3.1_linux_amd64",
+        content=b"shfmt",
+    )
+    collected: list[Metrics] = []
+
+    installer = GhReleaseInstall(
+        repository="mvdan/sh",
+        asset="shfmt_{tag}_linux_amd64",
+        destination=tmp_path / "shfmt",
+        version="v3.3.1",
+        checksum=f"sha256:{hashlib.sha256(b'shfmt').hexdigest()}",
+        metrics_callback=collected.append,
+    )
+    installer.run()
+
+    assert collected == [installer.metrics]
+    metrics = installer.metrics
+    assert metrics.status == "installed"
+    assert metrics.tag == "v3.3.1"
+    assert metrics.downloaded_bytes == 5
+    assert not metrics.cache_hit
+    assert set(metrics.phases) == {"resolve", "verify", "download", "install"}
+    assert metrics.duration >= sum(metrics.phases.values())
+
+
+def test_installer_mirror_fallback(requests_mock, tmp_path: Path):
+    requests_mock.get(
+        "http://mirror.local/api/repos/mvdan/sh/releases/latest",
+        exc=exceptions.ConnectionError,
+    )
+    requests_mock.get(
+        "https://api.github.com/repos/mvdan/sh/releases/latest",
+        json={"tag_name": "v3.3.1"},
+    )
+    requests_mock.get(
+        "http://mirror.local/mvdan/sh/releases/download/v3.3.1/checksums.txt",
+        text=f"{hashlib.sha256(b'shfmt').hexdigest()}  shfmt_v3.3.1_linux_amd64\n",
+    )
+    requests_mock.get(
+        "http://mirror.local/mvdan/sh/releases/download/v3.3.1/shfmt_v3.3.1_linux_amd64",
+        status_code=404,
+    )
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_v3.3.1_linux_amd64",
+        content=b"shfmt",
+    )
+
+    GhReleaseInstall(
+        repository="mvdan/sh",
+        asset="shfmt_{tag}_linux_amd64",
+        destination=tmp_path / "shfmt",
+        checksum="sha256:checksums.txt",
+        api_urls=["http://mirror.local/api/", "https://api.github.com"],
+        download_urls=["http://mirror.local", "https://github.com"],
+    ).run()
+
+    assert (tmp_path / "shfmt").read_bytes() == b"shfmt"
+    assert "checksums.txt" not in {
+        request.url.rsplit("/", 1)[-1]
+        for request in requests_mock.request_history
+        if request.hostname == "github.com"
+    }
+
+
+class InterruptedBody(io.BytesIO):
+    def read(self, *args, **kwargs):
+        blob = super().read(*args, **kwargs)
+        if not blob:
+            raise OSError("connection reset")
+        return blob
+
+
+def test_installer_mirror_fallback_interrupted(requests_mock, tmp_path: Path):
+    requests_mock.get(
+        "http://mirror.local/mvdan/sh/releases/download/v3.3.1/shfmt_v3.3.1_linux_amd64",
+        # The first chunks are hashed before the download is interrupted.
+        body=InterruptedBody(bytes(2 * 1024 * 1024 + 1)),
+    )
+    github_mock = requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_v3.3.1_linux_amd64",
+        content=b"shfmt",
+    )
+
+    GhReleaseInstall(
+        repository="mvdan/sh",
+        asset="shfmt_{tag}_linux_amd64",
+        destination=tmp_path / "shfmt",
+        version="v3.3.1",
+        checksum=f"sha256:{hashlib.sha256(b'shfmt').hexdigest()}",
+        download_urls=["http://mirror.local", "https://github.com"],
+    ).run()
+
+    assert (tmp_path / "shfmt").read_bytes() == b"shfmt"
+    assert github_mock.call_count == 1
+
+
+def test_installer_single_flight_download(requests_mock, tmp_path: Path):
+    asset_mock = requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_v3.3.1_linux_amd64",
+        content=b"shfmt",
+    )
+    installers = [
+        GhReleaseInstall(
+            repository="mvdan/sh",
+            asset="shfmt_{tag}_linux_amd64",
+            destination=tmp_path / f"shfmt-{index}",
+            version="v3.3.1",
+            cache_dir=tmp_path / "cache",
+        )
+        for index in range(4)
+    ]
+
+    with ThreadPoolExecutor() as executor:
+        for future in [executor.submit(installer.run) for installer in installers]:
+            future.result()
+
+    assert asset_mock.call_count == 1
+    assert sum(installer.metrics.cache_hit for installer in installers) == 3
+
+
+def test_installer_corrupted_download_not_cached(requests_mock, tmp_path: Path):
+    url = (
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_v3.3.1_linux_amd64"
+    )
+
+    def install():
+        GhReleaseInstall(
+            repository="mvdan/sh",
+            asset="shfmt_{tag}_linux_amd64",
+            destination=tmp_path / "shfmt",
+            version="v3.3.1",
+            checksum=f"sha256:{hashlib.sha256(b'shfmt').hexdigest()}",
+            cache_dir=tmp_path / "cache",
+        ).run()
+
+    requests_mock.get(url, content=b"corrupted")
+    with pytest.raises(SystemExit):
+        install()
+    assert not Cache(tmp_path / "cache").entries()
+
+    asset_mock = requests_mock.get(url, content=b"shfmt")
+    install()
+
+    assert (tmp_path / "shfmt").read_bytes() == b"shfmt"
+    assert asset_mock.call_count == 1
+    assert len(Cache(tmp_path / "cache").entries()) == 1
+
+
+def test_installer_download_moved_to_cache(requests_mock, tmp_path: Path, monkeypatch):
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_v3.3.1_linux_amd64",
+        content=b"shfmt",
+    )
+
+    def copied(*args):
+        raise AssertionError(f"asset copied or hashed again: {args}")
+
+    # The downloaded asset is renamed into the cache, with the download digest.
+    monkeypatch.setattr(cache_module, "clone_file", copied)
+    monkeypatch.setattr(cache_module, "compute_file_checksum", copied)
+
+    GhReleaseInstall(
+        repository="mvdan/sh",
+        asset="shfmt_{tag}_linux_amd64",
+        destination=tmp_path / "shfmt",
+        version="v3.3.1",
+        checksum=f"sha256:{hashlib.sha256(b'shfmt').hexdigest()}",
+        cache_dir=tmp_path / "cache",
+    ).run()
+
+    assert (tmp_path / "shfmt").read_bytes() == b"shfmt"
+    monkeypatch.undo()
+    (entry,) = Cache(tmp_path / "cache").entries()
+    assert entry.path.read_bytes() == b"shfmt"
+    assert not list((tmp_path / "cache/partial").iterdir())
+
+
+def test_installer_asset_larger_than_cache(requests_mock, tmp_path: Path):
+    requests_mock.get(
+        "https://github.com/mvdan/sh/releases/download/v3.3.1/shfmt_v3.3.1_linux_amd64",
+        content=b"s" * 5000,
+    )
+
+    GhReleaseInstall(
+        repository="mvdan/sh",
+        asset="shfmt_{tag}_linux_amd64",
+        destination=tmp_path / "shfmt",
+        version="v3.3.1",
+        cache_dir=tmp_path / "cache",
+        cache_max_size=1000,
+    ).run()
+
+    assert (tmp_path / "shfmt").read_bytes() == b"s" * 5000
+    (entry,) = Cache(tmp_path / "cache").entries()
+    assert entry.size == 5000
+
+
+def _zip_asset(members: dict[str, bytes]) -> bytes:
+    archive_fd = io.BytesIO()
+    with zipfile.ZipFile(archive_fd, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return archive_fd.getvalue()
+
+
+def test_installer_remote_extract(requests_mock, tmp_path: Path):
+    asset = _zip_asset({"tool/README": b"readme" * 1024, "tool/tool": b"tool"})
+
+    def range_callback(request, context):
+        suffix = int(request.headers["Range"].removeprefix("bytes=-"))
+        start = max(len(asset) - suffix, 0)
+        context.status_code = 206
+        context.headers["Content-Range"] = (
+            f"bytes {start}-{len(asset) - 1}/{len(asset)}"
+        )
+        return asset[start:]
+
+    requests_mock.get(
+        "https://github.com/example/tool/releases/download/v1.0.0/checksums.txt",
+        text=f"{hashlib.sha256(b'tool').hexdigest()}  tool/tool\n",
+    )
+    requests_mock.get(
+        "https://github.com/example/tool/releases/download/v1.0.0/tool.zip",
+        content=range_callback,
+    )
+
+    installer = GhReleaseInstall(
+        repository="example/tool",
+        asset="tool.zip",
+        extract="tool/tool",
+        remote_extract=True,
+        destination=tmp_path / "tool",
+        version="v1.0.0",
+        checksum="sha256:checksums.txt",
+    )
+    installer.run()
+
+    assert (tmp_path / "tool").read_bytes() == b"tool"
+    assert installer.metrics.downloaded_bytes == len(asset)
+
+    # The installed file is verified using its own checksum.
+    installer.run()
+    assert installer.metrics.status == "verified"
+
+
+def test_installer_remote_extract_fallback(requests_mock, tmp_path: Path):
+    asset = _zip_asset({"tool/tool": b"tool"})
+    requests_mock.get(
+        "https://github.com/example/tool/releases/download/v1.0.1/tool.zip",
+        content=asset,
+    )
+
+    GhReleaseInstall(
+        repository="example/tool",
+        asset="tool.zip",
+        extract="tool/tool",
+        remote_extract=True,
+        destination=tmp_path / "tool",
+        version="v1.0.1",
+        checksum=hashlib.sha256(b"tool").hexdigest(),
+    ).run()
+
+    assert (tmp_path / "tool").read_bytes() == b"tool"
+
+
+def _release(tag: str, *assets: str) -> dict:
+    return {"tag_name": tag, "assets": [{"name": name} for name in assets]}
+
+
+def test_installer_missing_asset(requests_mock, tmp_path: Path):
+    requests_mock.get(
+        "https://api.github.com/repos/example/missing/releases/latest",
+        json=_release("v1.0.0", "tool_linux_amd64", "checksums.txt"),
+    )
+    requests_mock.get(
+        "https://api.github.com/repos/example/missing/releases/tags/v1.0.0",
+        json=_release("v1.0.0", "tool_linux_amd64", "checksums.txt"),
+    )
+
+    installer = GhReleaseInstall(
+        repository="example/missing",
+        asset="tool_linux_arm64",
+        destination=tmp_path / "tool",
+        checksum="sha256:checksums.txt",
+    )
+    with pytest.raises(SystemExit):
+        installer.run()
+
+    # The index is refreshed once, and nothing is downloaded.
+    assert requests_mock.call_count == 2
+    assert installer.metrics.status == "failed"
+
+
+def test_installer_cached_release_assets_refresh(requests_mock, tmp_path: Path):
+    cache = Cache(tmp_path / "cache")
+    cache.put_release_assets("example/refresh", "v1.0.0", {"checksums.txt": {}})
+    requests_mock.get(
+        "https://api.github.com/repos/example/refresh/releases/tags/v1.0.0",
+        json=_release("v1.0.0", "tool_linux_amd64", "checksums.txt"),
+    )
+    requests_mock.get(
+        "https://github.com/example/refresh/releases/download/v1.0.0/tool_linux_amd64",
+        content=b"tool",
+    )
+
+    GhReleaseInstall(
+        repository="example/refresh",
+        asset="tool_linux_amd64",
+        destination=tmp_path / "tool",
+        version="v1.0.0",
+        cache_dir=tmp_path / "cache",
+    ).run()
+
+    assert (tmp_path / "tool").read_bytes() == b"tool"
+    assets = cache.get_release_assets("example/refresh", "v1.0.0")
+    assert assets is not None and "tool_linux_amd64" in assets
+
+
+def test_installer_unknown_release_assets(requests_mock, tmp_path: Path):
+    requests_mock.get(
+        "http://mirror.local/api/repos/example/mirror/releases/latest",
+        json={"tag_name": "v1.0.0", "assets": []},
+    )
+    requests_mock.get(
+        "http://mirror.local/example/mirror/releases/download/v1.0.0/tool_linux_amd64",
+        content=b"tool",
+    )
+
+    for version in ("latest", "v1.0.0"):
+        GhReleaseInstall(
+            repository="example/mirror",
+            asset="tool_linux_amd64",
+            destination=tmp_path / "tool",
+            version=version,
+            cache_dir=tmp_path / "cache",
+            api_urls=["http://mirror.local/api"],
+            download_urls=["http://mirror.local"],
+        ).run()
+
+    assert (tmp_path / "tool").read_bytes() == b"tool"
+    # The pinned version does not fetch the release assets index.
+    assert "/releases/tags/" not in "".join(
+        request.url for request in requests_mock.request_history
+    )
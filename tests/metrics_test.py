@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from gh_release_install.metrics import (
+    Metrics,
+    format_prometheus,
+    write_metrics_json,
+    write_prometheus_textfile,
+)
+
+
+def _metrics() -> Metrics:
+    metrics = Metrics("mvdan/sh", 'shfmt_"{tag}"')
+    metrics.status = "installed"
+    metrics.tag = "v3.3.1"
+    metrics.duration = 3.0
+    metrics.phases = {"resolve": 0.5, "download": 2.0}
+    metrics.downloaded_bytes = 1000
+    return metrics
+
+
+def test_metrics_phase():
+    metrics = Metrics("mvdan/sh", "shfmt")
+    with metrics.phase("verify"):
+        pass
+    with metrics.phase("verify"):
+        pass
+
+    assert list(metrics.phases) == ["verify"]
+    assert metrics.throughput is None
+
+
+def test_metrics_to_dict():
+    result = _metrics().to_dict()
+
+    assert result["throughput"] == 500
+    assert result["phases"] == {"resolve": 0.5, "download": 2.0}
+
+
+def test_format_prometheus():
+    result = format_prometheus([_metrics()])
+
+    assert "# TYPE gh_release_install_success gauge" in result
+    assert (
+        'gh_release_install_success{repository="mvdan/sh",asset="shfmt_\\"{tag}\\""} 1.0'
+        in result
+    )
+    assert (
+        'gh_release_install_phase_duration_seconds{repository="mvdan/sh",'
+        'asset="shfmt_\\"{tag}\\"",phase="download"} 2.0'
+    ) in result
+    assert result.endswith("\n")
+
+
+def test_format_prometheus_destinations():
+    runs = [Metrics("mvdan/sh", "shfmt", destination) for destination in ("a", "b")]
+
+    result = format_prometheus(runs)
+
+    for destination in ("a", "b"):
+        assert (
+            'gh_release_install_success{repository="mvdan/sh",asset="shfmt",'
+            f'destination="{destination}"}} 1.0'
+        ) in result
+
+
+def test_write_metrics(tmp_path: Path):
+    write_metrics_json(tmp_path / "metrics.json", [_metrics()])
+    write_prometheus_textfile(tmp_path / "metrics.prom", [_metrics()])
+
+    result = json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8"))
+    assert result[0]["downloaded_bytes"] == 1000
+    assert (tmp_path / "metrics.prom").stat().st_mode & 0o777 == 0o644
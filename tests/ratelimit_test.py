@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import io
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from time import time
+
+import pytest
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+
+from gh_release_install import ratelimit
+from gh_release_install.main import new_session
+from gh_release_install.ratelimit import RateLimit, RateLimitAdapter
+
+
+def _response(status_code: int = 200, headers: dict | None = None) -> Response:
+    res = Response()
+    res.status_code = status_code
+    res.headers.update(headers or {})
+    res.raw = io.BytesIO()
+    return res
+
+
+def _budget(remaining: int, reset: float) -> Response:
+    return _response(
+        headers={
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(int(reset)),
+        }
+    )
+
+
+def test_rate_limit_update():
+    rate_limit = RateLimit()
+    rate_limit.update(_response())
+    assert rate_limit.snapshot()["remaining"] is None
+
+    rate_limit.update(_budget(4000, time() + 60))
+    assert rate_limit.snapshot()["limit"] == 5000
+    assert rate_limit.snapshot()["remaining"] == 4000
+    assert rate_limit.delay() == 0
+
+
+def test_rate_limit_pacing():
+    rate_limit = RateLimit()
+    rate_limit.update(_budget(99, time() + 100))
+
+    assert 0.9 < rate_limit.delay() <= 1
+    assert rate_limit.snapshot()["remaining"] == 98
+
+
+@pytest.mark.parametrize(
+    "res, expected",
+    [
+        pytest.param(_response(200), None, id="ok"),
+        pytest.param(_response(403), None, id="forbidden"),
+        pytest.param(_response(429, {"Retry-After": "3"}), 3, id="retry-after"),
+        pytest.param(_response(403, {"X-RateLimit-Remaining": "0"}), 1, id="empty"),
+    ],
+)
+def test_rate_limit_retry_delay(res, expected):
+    assert RateLimit().retry_delay(res) == expected
+
+
+def test_rate_limit_adapter(monkeypatch):
+    responses = [_response(429, {"Retry-After": "2"}), _budget(4000, time() + 60)]
+    delays: list[float] = []
+    monkeypatch.setattr(HTTPAdapter, "send", lambda *args: responses.pop(0))
+    monkeypatch.setattr(ratelimit, "sleep", delays.append)
+
+    adapter = RateLimitAdapter()
+    res = adapter.send(PreparedRequest())
+
+    assert res.status_code == 200
+    assert delays == [2]
+    assert adapter.rate_limit.snapshot()["rate_limited"] == 1
+
+
+class RateLimitedHandler(BaseHTTPRequestHandler):
+    requests = 0
+
+    # pylint: disable=invalid-name
+    def do_GET(self):
+        RateLimitedHandler.requests += 1
+        self.send_response(429)
+        self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+def test_rate_limited_requests_retried_once(monkeypatch):
+    monkeypatch.setattr(ratelimit, "sleep", lambda delay: None)
+    RateLimitedHandler.requests = 0
+    with ThreadingHTTPServer(("127.0.0.1", 0), RateLimitedHandler) as server:
+        Thread(target=server.serve_forever, daemon=True).start()
+        api_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            with new_session(api_urls=[api_url]) as session:
+                res = session.get(f"{api_url}/repos/mvdan/sh/releases/latest")
+        finally:
+            server.shutdown()
+
+    assert res.status_code == 429
+    # The rate limit adapter retries are not multiplied by the transport retries.
+    assert RateLimitedHandler.requests == 1 + ratelimit.RATE_LIMITED_RETRIES
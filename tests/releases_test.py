@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from requests import Session
+
+from gh_release_install import releases
+from gh_release_install.cache import Cache
+from gh_release_install.releases import (
+    fetch_release_assets,
+    get_latest_tags,
+    graphql_url,
+    known_release_assets,
+)
+
+API_URL = "http://localhost:8080/api"
+
+
+def test_get_latest_tags_graphql(requests_mock):
+    def graphql_callback(request, context):
+        # pylint: disable=unused-argument
+        variables = json.loads(request.body)["variables"]
+        assert variables == {
+            "o0": "mvdan",
+            "n0": "sh",
+            "o1": "org",
+            "n1": "missing",
+            "o2": "prometheus",
+            "n2": "prometheus",
+        }
+        return {
+            "data": {
+                "r0": {"latestRelease": {"tagName": "v3.3.1"}},
+                "r1": None,
+                "r2": {"latestRelease": {"tagName": "v2.28.1"}},
+            },
+            "errors": [{"message": "Could not resolve to a Repository"}],
+        }
+
+    graphql_mock = requests_mock.post(f"{API_URL}/graphql", json=graphql_callback)
+
+    with Session() as session:
+        session.headers["Authorization"] = "token secret"
+        tags = get_latest_tags(
+            session,
+            ["prometheus/prometheus", "mvdan/sh", "org/missing", "mvdan/sh"],
+            api_urls=[API_URL],
+        )
+
+    assert tags == {"mvdan/sh": "v3.3.1", "prometheus/prometheus": "v2.28.1"}
+    assert graphql_mock.call_count == 1
+
+
+def test_get_latest_tags_graphql_cached(requests_mock, tmp_path: Path):
+    cache = Cache(tmp_path / "cache")
+    cache.put_latest(
+        "mvdan/sh",
+        {"tag": "v3.3.0", "etag": '"abc"', "last_modified": None, "checked_at": 0},
+    )
+    graphql_mock = requests_mock.post(
+        f"{API_URL}/graphql",
+        json={"data": {"r0": {"latestRelease": {"tagName": "v3.3.1"}}}},
+    )
+
+    with Session() as session:
+        session.headers["Authorization"] = "token secret"
+        for _ in range(2):
+            tags = get_latest_tags(
+                session, ["mvdan/sh"], cache, ttl=60, api_urls=[API_URL]
+            )
+            assert tags == {"mvdan/sh": "v3.3.1"}
+
+    # Within the ttl, the tag resolved by the GraphQL query is used without request.
+    assert graphql_mock.call_count == 1
+    latest = cache.get_latest("mvdan/sh")
+    assert latest is not None
+    assert latest["tag"] == "v3.3.1"
+    # The validators of the previous tag do not apply to the new one.
+    assert latest["etag"] is None
+
+
+def test_get_latest_tags_rest(requests_mock):
+    requests_mock.get(
+        f"{API_URL}/repos/mvdan/sh/releases/latest",
+        json={"tag_name": "v3.3.1"},
+    )
+    requests_mock.get(
+        f"{API_URL}/repos/org/missing/releases/latest",
+        status_code=404,
+    )
+
+    with Session() as session:
+        tags = get_latest_tags(session, ["mvdan/sh", "org/missing"], api_urls=[API_URL])
+
+    assert tags == {"mvdan/sh": "v3.3.1"}
+
+
+def test_fetch_release_assets(requests_mock, tmp_path: Path, monkeypatch):
+    requests_mock.get(
+        f"{API_URL}/repos/mvdan/sh/releases/tags/v3.3.0",
+        json={
+            "tag_name": "v3.3.0",
+            "assets": [
+                {
+                    "name": "shfmt_v3.3.0_linux_amd64",
+                    "size": 3031040,
+                    "content_type": "application/octet-stream",
+                    "browser_download_url": "https://github.com/mvdan/sh/releases"
+                    "/download/v3.3.0/shfmt_v3.3.0_linux_amd64",
+                }
+            ],
+        },
+    )
+    cache = Cache(tmp_path)
+
+    with Session() as session:
+        assets = fetch_release_assets(
+            session, "mvdan/sh", "v3.3.0", cache, api_urls=[API_URL]
+        )
+
+    assert list(assets) == ["shfmt_v3.3.0_linux_amd64"]
+    assert assets["shfmt_v3.3.0_linux_amd64"]["size"] == 3031040
+    assert known_release_assets("mvdan/sh", "v3.3.0") == assets
+
+    # Another process reads the index from the cache.
+    monkeypatch.setattr(releases, "_release_assets", {})
+    assert known_release_assets("mvdan/sh", "v3.3.0") is None
+    assert known_release_assets("mvdan/sh", "v3.3.0", cache) == assets
+
+
+@pytest.mark.parametrize(
+    "api_url, expected",
+    [
+        ("https://api.github.com", "https://api.github.com/graphql"),
+        ("https://ghe.example.com/api/v3", "https://ghe.example.com/api/graphql"),
+    ],
+)
+def test_graphql_url(api_url, expected):
+    assert graphql_url(api_url) == expected
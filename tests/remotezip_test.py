@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+from requests import Session
+
+from gh_release_install.checksum import new_checksum
+from gh_release_install.download import RangeNotSupported
+from gh_release_install.remotezip import TAIL_SIZE, RemoteFile, fetch_zip_member
+
+URL = "https://github.com/example/tool/releases/download/v1.0.0/tool.zip"
+CDN_URL = "https://objects.githubusercontent.com/tool.zip"
+
+TOOL = os.urandom(256 * 1024) + bytes(256 * 1024)
+OTHER = os.urandom(4 * 1024 * 1024)
+
+
+def _zip() -> bytes:
+    archive_fd = io.BytesIO()
+    with zipfile.ZipFile(archive_fd, "w") as archive:
+        archive.writestr("tool/other", OTHER, zipfile.ZIP_STORED)
+        archive.writestr("tool/tool", TOOL, zipfile.ZIP_DEFLATED)
+        archive.writestr("tool/last", OTHER, zipfile.ZIP_STORED)
+    return archive_fd.getvalue()
+
+
+ARCHIVE = _zip()
+
+
+def _range_callback(request, context):
+    assert "Authorization" not in request.headers
+    start, end = request.headers["Range"].removeprefix("bytes=").split("-")
+    if not start:
+        start, end = str(max(len(ARCHIVE) - int(end), 0)), ""
+    end = end or str(len(ARCHIVE) - 1)
+    context.status_code = 206
+    context.headers["Content-Range"] = f"bytes {start}-{end}/{len(ARCHIVE)}"
+    return ARCHIVE[int(start) : int(end) + 1]
+
+
+@pytest.fixture(name="ranges")
+def fixture_ranges(requests_mock):
+    requests_mock.get(URL, status_code=302, headers={"Location": CDN_URL})
+    return requests_mock.get(CDN_URL, content=_range_callback)
+
+
+def test_fetch_zip_member(ranges, tmp_path: Path):
+    mixer = new_checksum("sha256")
+
+    with Session() as session:
+        session.headers["Authorization"] = "token secret"
+        with RemoteFile(session, URL) as remote:
+            extracted = fetch_zip_member(remote, "./tool/tool", tmp_path, mixer)
+
+    assert extracted == tmp_path / "tool/tool"
+    assert extracted.read_bytes() == TOOL
+    assert mixer.hexdigest() == hashlib.sha256(TOOL).hexdigest()
+    # The other members are never downloaded.
+    assert remote.downloaded < TAIL_SIZE + len(TOOL)
+    # The central directory is read from the tail, then the member is streamed.
+    assert ranges.call_count == 2
+
+
+def test_fetch_zip_member_not_found(ranges, tmp_path: Path):
+    # pylint: disable=unused-argument
+    with Session() as session, RemoteFile(session, URL) as remote:
+        extracted = fetch_zip_member(remote, "tool/missing", tmp_path)
+
+    assert not extracted.exists()
+
+
+def test_fetch_zip_member_small_tail(ranges, tmp_path: Path):
+    # pylint: disable=unused-argument
+    with Session() as session, RemoteFile(session, URL, tail_size=64) as remote:
+        fetch_zip_member(remote, "tool/tool", tmp_path)
+
+    assert (tmp_path / "tool/tool").read_bytes() == TOOL
+
+
+def test_fetch_zip_member_small_archive(requests_mock, tmp_path: Path):
+    requests_mock.get(URL, content=_range_callback)
+
+    with (
+        Session() as session,
+        RemoteFile(session, URL, tail_size=len(ARCHIVE)) as remote,
+    ):
+        fetch_zip_member(remote, "tool/tool", tmp_path)
+
+    assert (tmp_path / "tool/tool").read_bytes() == TOOL
+    assert requests_mock.call_count == 1
+
+
+class ReadCounter(io.BytesIO):
+    read_size = 0
+
+    def read(self, size=-1, /):
+        data = super().read(size)
+        self.read_size += len(data)
+        return data
+
+
+def test_remote_file_range_not_supported(requests_mock):
+    body = ReadCounter(ARCHIVE)
+    requests_mock.get(URL, body=body)
+
+    with Session() as session, pytest.raises(RangeNotSupported):
+        RemoteFile(session, URL)
+
+    # The archive is not downloaded when the server ignores the range.
+    assert body.read_size == 0
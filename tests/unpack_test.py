@@ -1,11 +1,35 @@
 from __future__ import annotations
 
+import bz2
+import gzip
+import io
+import lzma
+import tarfile
+import tracemalloc
+import zipfile
 from pathlib import Path
 
-from gh_release_install.unpack import _unpack_bz2
+import pytest
+
+from gh_release_install.unpack import (
+    _unpack_bz2,
+    _unpack_gzip,
+    _unpack_xz,
+    _unpack_zstd,
+    can_extract_member,
+    extract_member,
+    zstd,
+)
 
 here = Path(__file__).parent
 
+requires_zstd = pytest.mark.skipif(zstd is None, reason="zstd is not available")
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    assert zstd is not None
+    return zstd.compress(data)
+
 
 def test_unpack_bz2(tmp_path):
     src = Path(here / "fixtures/test.txt.bz2")
@@ -15,3 +39,121 @@ def test_unpack_bz2(tmp_path):
 
     assert dest.is_file
     assert dest.read_text(encoding="utf-8") == "Hello World\n"
+
+
+@pytest.mark.parametrize(
+    "suffix, compress, unpack, limit",
+    [
+        (".gz", gzip.compress, _unpack_gzip, 8),
+        (".bz2", bz2.compress, _unpack_bz2, 8),
+        # The xz default preset uses a 8 MiB dictionary.
+        (".xz", lzma.compress, _unpack_xz, 16),
+        pytest.param(".zst", _zstd_compress, _unpack_zstd, 8, marks=requires_zstd),
+    ],
+)
+def test_unpack_bounded_memory(tmp_path: Path, suffix, compress, unpack, limit: int):
+    size = 64 * 1024 * 1024
+    src = tmp_path / f"payload{suffix}"
+    src.write_bytes(compress(b"\0" * size))
+
+    tracemalloc.start()
+    try:
+        unpack(src, tmp_path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert (tmp_path / "payload").stat().st_size == size
+    assert peak < limit * 1024 * 1024
+
+
+def _make_tar(path: Path, mode: str):
+    with tarfile.open(path, mode) as archive:  # type: ignore[call-overload]
+        for name, content in (
+            ("release/README.md", b"readme"),
+            ("release/binary", b"binary"),
+            ("release/other", b"other"),
+        ):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+
+        link = tarfile.TarInfo("release/link")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "binary"
+        archive.addfile(link)
+
+
+@pytest.mark.parametrize(
+    "name, mode",
+    [
+        ("archive.tar", "w"),
+        ("archive.tar.gz", "w:gz"),
+        ("archive.tar.bz2", "w:bz2"),
+        ("archive.tar.xz", "w:xz"),
+    ],
+)
+def test_extract_member_tar(tmp_path: Path, name: str, mode: str):
+    archive = tmp_path / name
+    _make_tar(archive, mode)
+    extract_dir = tmp_path / "extract"
+
+    assert can_extract_member(archive)
+    extracted = extract_member(archive, "./release/binary", extract_dir)
+
+    assert extracted == extract_dir / "release/binary"
+    assert extracted.read_bytes() == b"binary"
+    assert sorted(p.name for p in extract_dir.rglob("*")) == ["binary", "release"]
+
+
+@requires_zstd
+@pytest.mark.parametrize("member", ["release/binary", "release/link"])
+def test_extract_member_tar_zstd(tmp_path: Path, member: str):
+    tar = tmp_path / "archive.tar"
+    _make_tar(tar, "w")
+    archive = tmp_path / "archive.tar.zst"
+    archive.write_bytes(_zstd_compress(tar.read_bytes()))
+
+    assert can_extract_member(archive)
+    extracted = extract_member(archive, member, tmp_path / "extract")
+
+    assert extracted.read_bytes() == b"binary"
+
+
+def test_extract_member_tar_link(tmp_path: Path):
+    archive = tmp_path / "archive.tar.gz"
+    _make_tar(archive, "w:gz")
+
+    extracted = extract_member(archive, "release/link", tmp_path)
+
+    assert extracted.read_bytes() == b"binary"
+
+
+def test_extract_member_zip(tmp_path: Path):
+    archive = tmp_path / "archive.zip"
+    with zipfile.ZipFile(archive, "w") as archive_fd:
+        archive_fd.writestr("release/binary", b"binary")
+        archive_fd.writestr("release/other", b"other")
+    extract_dir = tmp_path / "extract"
+
+    extracted = extract_member(archive, "release/binary", extract_dir)
+
+    assert extracted.read_bytes() == b"binary"
+    assert not (extract_dir / "release/other").exists()
+
+
+def test_extract_member_not_found(tmp_path: Path):
+    archive = tmp_path / "archive.tar.gz"
+    _make_tar(archive, "w:gz")
+
+    extracted = extract_member(archive, "release/missing", tmp_path)
+
+    assert not extracted.exists()
+
+
+def test_extract_member_outside(tmp_path: Path):
+    archive = tmp_path / "archive.tar.gz"
+    _make_tar(archive, "w:gz")
+
+    with pytest.raises(ValueError):
+        extract_member(archive, "../binary", tmp_path / "extract")